@@ -0,0 +1,289 @@
+"""
+Answers many degrees-of-separation queries against one loaded dataset.
+
+Usage:
+    python batch.py [--compact] directory pairs.csv     # CSV with source,target columns
+    python batch.py [--compact] directory pairs.jsonl   # {"source": ..., "target": ...} per line
+    python batch.py [--compact] directory --serve       # JSON queries on stdin, answers on stdout
+    python batch.py [--compact] directory --http PORT   # GET /?source=...&target=...
+    python batch.py [--compact] directory --histogram PERSON  # CSV of people per degree from PERSON
+
+Sources and targets may be IMDb person ids or names. Names may have one
+typo, and may end with a birth year in parentheses to pick between people
+with the same name, as in "Kevin Bacon (1958)". Every answer is one line of
+JSON, written as soon as it is ready. A query may also ask for "count": true,
+the number of different shortest paths, and "paths": k, up to k of them.
+
+With --workers, queries from a file are answered by a pool of processes.
+Where the platform can fork, workers inherit the loaded dataset from the
+parent instead of loading or receiving their own copy; elsewhere each worker
+loads it once, which in compact mode maps the same snapshot pages.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+def resolve_person(value):
+    """
+    Returns (person_id, error) for a person id or name, without prompting.
+    The name index is only built for the first value that is not an id.
+    """
+    value = str(value)
+    if value in degrees.people:
+        return value, None
+    return degrees.get_name_index().resolve(value)
+
+
+def parse_query(line):
+    """
+    Returns the query on a line of JSON, or None if it is not valid JSON.
+    """
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def path_limit(value):
+    """
+    Returns a query's "paths" value as a number of paths, or None if it is
+    not a non-negative integer. Query strings, as over HTTP, may give it as
+    digits.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.strip().isdecimal():
+        return int(value)
+    return None
+
+
+def count_flag(value):
+    """
+    Returns a query's "count" value as True or False, or None if it is not
+    a flag. Query strings, as over HTTP, may give it as "true", "false",
+    "1" or "0".
+    """
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        return {"true": True, "1": True, "false": False, "0": False}.get(value.strip().lower())
+    return None
+
+
+def query_error(query):
+    """
+    Returns what is wrong with a query object, or None if it can be answered.
+    """
+    for key in ["source", "target"]:
+        if query.get(key) in (None, ""):
+            return f"missing {key}"
+    if query.get("paths") not in (None, False) and path_limit(query["paths"]) is None:
+        return "paths must be a non-negative integer"
+    if query.get("count") is not None and count_flag(query["count"]) is None:
+        return "count must be true or false"
+    return None
+
+
+def answer(query):
+    """
+    Returns the answer to a {"source": ..., "target": ...} query as a
+    dictionary, with an "error" instead of a path if it cannot be answered.
+    """
+    if not isinstance(query, dict):
+        return {"error": "expected a JSON object"}
+    response = {"source": query.get("source"), "target": query.get("target")}
+    error = query_error(query)
+    if error is None:
+        source, error = resolve_person(query.get("source"))
+    if error is None:
+        target, error = resolve_person(query.get("target"))
+    if error is not None:
+        response["error"] = error
+        return response
+
+    path = degrees.shortest_path(source, target)
+    if path is None:
+        response["degrees"] = None
+        response["path"] = None
+    else:
+        response["degrees"] = len(path)
+        response["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+        if count_flag(query.get("count")):
+            response["count"] = degrees.count_shortest_paths(source, target)
+        if query.get("paths"):
+            response["paths"] = [
+                [[movie_id, person_id] for movie_id, person_id in path]
+                for path in degrees.all_shortest_paths(source, target, path_limit(query["paths"]))
+            ]
+    return response
+
+
+def read_queries(filename):
+    """
+    Yields queries from a CSV file with source and target columns,
+    or from a JSON Lines file of {"source": ..., "target": ...} objects.
+    Lines that are not valid JSON are yielded as None, and a missing
+    column as a missing key, so that answer() reports them one at a time.
+    """
+    with open(filename, encoding="utf-8") as f:
+        if filename.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield parse_query(line)
+        else:
+            for row in csv.DictReader(f):
+                yield {"source": row.get("source"), "target": row.get("target")}
+
+
+def write_answers(answers, output):
+    """
+    Writes each answer to output as one line of JSON, flushing as it goes.
+    Returns the number of answers written.
+    """
+    count = 0
+    for response in answers:
+        output.write(json.dumps(response) + "\n")
+        output.flush()
+        count += 1
+    return count
+
+
+def write_histogram(source, output):
+    """
+    Writes a CSV of how many people are at each degree of separation from source.
+    """
+    writer = csv.writer(output)
+    writer.writerow(["degrees", "people"])
+    for distance, count in degrees.distance_histogram(source).items():
+        writer.writerow(["unreachable" if distance is None else distance, count])
+
+
+def start_worker(directory, compact):
+    """
+    Loads the dataset in a worker process, unless it was inherited by fork.
+    """
+    if not degrees.people:
+        degrees.load_data(directory, compact)
+        if compact:
+            degrees.load_landmarks(directory)
+
+
+def process_pool(workers, directory, compact):
+    """
+    Returns a pool of worker processes that share the loaded dataset,
+    forking them where the platform allows it.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return context.Pool(workers, start_worker, (directory, compact))
+
+
+def answer_in_parallel(queries, workers, directory, compact, chunksize=64):
+    """
+    Yields answers to queries, in order, computed by a pool of worker processes.
+    """
+    with process_pool(workers, directory, compact) as pool:
+        yield from pool.imap(answer, queries, chunksize)
+
+
+def serve_lines(lines, output):
+    """
+    Answers one JSON query per line until the input ends.
+    """
+    for line in lines:
+        if line.strip():
+            write_answers([answer(parse_query(line))], output)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /?source=...&target=... with a JSON object.
+    """
+
+    def do_GET(self):
+        parameters = parse_qs(urlparse(self.path).query)
+        query = {key: values[0] for key, values in parameters.items()}
+        body = json.dumps(answer(query)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees-of-separation queries in bulk.")
+    parser.add_argument("directory", help="dataset directory")
+    parser.add_argument("queries", nargs="?", help="CSV or JSONL file of source/target pairs")
+    parser.add_argument("--compact", action="store_true", help="use the compact graph backend")
+    parser.add_argument("--serve", action="store_true", help="answer JSON queries from stdin")
+    parser.add_argument("--http", type=int, metavar="PORT", help="answer queries over HTTP on localhost")
+    parser.add_argument("--histogram", metavar="PERSON",
+                        help="write the distance histogram from a person id or name")
+    parser.add_argument("--workers", type=int,
+                        help="processes answering a queries file (0 for one per core)")
+    args = parser.parse_args()
+    modes = [args.queries is not None, args.serve, args.http is not None,
+             args.histogram is not None]
+    if sum(modes) != 1:
+        parser.error("give exactly one of a queries file, --serve, --http or --histogram")
+    if args.workers is None:
+        args.workers = 1
+    elif args.queries is None:
+        parser.error("--workers only applies to a queries file")
+    if args.workers < 0:
+        parser.error("--workers must not be negative")
+    workers = args.workers or os.cpu_count() or 1
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.compact)
+    if args.compact:
+        degrees.load_landmarks(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.histogram is not None:
+        source, error = resolve_person(args.histogram)
+        if error is not None:
+            sys.exit(error)
+        write_histogram(source, sys.stdout)
+    elif args.serve:
+        serve_lines(sys.stdin, sys.stdout)
+    elif args.http is not None:
+        server = HTTPServer(("127.0.0.1", args.http), QueryHandler)
+        print(f"Serving on http://127.0.0.1:{args.http}/", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        start = time.perf_counter()
+        queries = read_queries(args.queries)
+        if workers > 1:
+            answers = answer_in_parallel(queries, workers, args.directory, args.compact)
+        else:
+            answers = (answer(query) for query in queries)
+        count = write_answers(answers, sys.stdout)
+        elapsed = time.perf_counter() - start
+        print(f"{count} queries in {elapsed:.2f}s with {workers} worker(s) "
+              f"({count / max(elapsed, 1e-9):.1f} queries/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Micro-benchmarks for the degrees search code.
+
+Usage: python benchmark.py [frontier|landmarks] [directory]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+import util
+from landmarks import LandmarkIndex
+
+
+class ListStackFrontier():
+    """The original list-backed frontier, kept here only for comparison."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def timed(function, *args):
+    """
+    Returns how many seconds a call to function(*args) takes.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def fill_and_drain(frontier_class, states):
+    """
+    Adds a node for every state, probing membership first, then removes them all.
+    """
+    frontier = frontier_class()
+    for state in states:
+        if not frontier.contains_state(state):
+            frontier.add(util.Node(state, None, None))
+    while not frontier.empty():
+        frontier.remove()
+
+
+def search_pairs(frontier_class, pairs):
+    """
+    Runs a one-sided BFS for every pair using the given queue frontier.
+    """
+    original = degrees.QueueFrontier
+    degrees.QueueFrontier = frontier_class
+    try:
+        for source, target in pairs:
+            degrees.shortest_path(source, target, bidirectional=False)
+    finally:
+        degrees.QueueFrontier = original
+
+
+def benchmark_frontier(directory):
+    """
+    Compares the list-backed and deque-backed frontiers on the dataset.
+    """
+    degrees.load_data(directory)
+    person_ids = list(degrees.people)
+
+    # Frontier operations on their own, sized like a BFS over the whole dataset.
+    # The list frontiers are quadratic, so they get a smaller sample.
+    sample = person_ids[:min(len(person_ids), 5000)]
+    old = timed(fill_and_drain, ListQueueFrontier, sample)
+    new = timed(fill_and_drain, util.QueueFrontier, sample)
+    print(f"Queue ops, {len(sample)} states: list {old:.3f}s, deque {new:.3f}s "
+          f"({old / max(new, 1e-9):.0f}x)")
+    old = timed(fill_and_drain, ListStackFrontier, sample)
+    new = timed(fill_and_drain, util.StackFrontier, sample)
+    print(f"Stack ops, {len(sample)} states: list {old:.3f}s, deque {new:.3f}s "
+          f"({old / max(new, 1e-9):.0f}x)")
+
+    # Whole one-sided searches between random people.
+    random.seed(0)
+    pairs = [(random.choice(person_ids), random.choice(person_ids))
+             for _ in range(3)]
+    old = timed(search_pairs, ListQueueFrontier, pairs)
+    new = timed(search_pairs, util.QueueFrontier, pairs)
+    print(f"BFS, {len(pairs)} queries: list {old:.3f}s, deque {new:.3f}s "
+          f"({old / max(new, 1e-9):.0f}x)")
+
+
+def benchmark_landmarks(directory, queries=500):
+    """
+    Compares plain BFS with the landmark index on random pairs of people.
+    """
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+
+    start = time.perf_counter()
+    index = LandmarkIndex.load(graph, directory)
+    if index is None:
+        index = LandmarkIndex.build(graph)
+        print(f"Built {len(index.landmarks)} landmarks in {time.perf_counter() - start:.2f}s "
+              "(run landmarks.py to save them)")
+
+    random.seed(0)
+    person_ids = graph.person_ids
+    pairs = [(random.choice(person_ids), random.choice(person_ids))
+             for _ in range(queries)]
+
+    def run(search, pairs):
+        for source, target in pairs:
+            search(source, target)
+
+    def forward(source, target):
+        return graph.shortest_path(source, target, bidirectional=False)
+
+    # Plain one-sided BFS is much slower, so it only gets a sample of the pairs
+    sample = pairs[:max(1, queries // 10)]
+    timings = [
+        ("BFS", len(sample), timed(run, forward, sample)),
+        ("bidirectional BFS", len(pairs), timed(run, graph.shortest_path, pairs)),
+        ("landmarks", len(pairs), timed(run, index.shortest_path, pairs)),
+        ("landmark A* (ALT)", len(sample), timed(run, index.alt_path, sample)),
+    ]
+    for name, count, seconds in timings:
+        print(f"{name}: {1000 * seconds / count:.3f}ms per query")
+
+    # How often the bounds alone settle a query
+    exact = disconnected = 0
+    for source, target in pairs:
+        lower, upper = index.bounds(source, target)
+        if lower is None:
+            disconnected += 1
+        elif lower == upper:
+            exact += 1
+    print(f"Bounds meet for {exact} and prove disconnection for {disconnected} "
+          f"of {len(pairs)} queries")
+
+
+def main():
+    benchmarks = {
+        "frontier": benchmark_frontier,
+        "landmarks": benchmark_landmarks,
+    }
+    if len(sys.argv) not in [2, 3] or sys.argv[1] not in benchmarks:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(benchmarks)}] [directory]")
+    directory = sys.argv[2] if len(sys.argv) == 3 else "large"
+    benchmarks[sys.argv[1]](directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
-import csv
+import itertools
 import sys
 
+from graph import Graph
+from landmarks import LandmarkIndex
+from loader import DEFAULT_CHUNK_SIZE, LoadStats, read_chunks
+from nameindex import NameIndex, split_birth
+from snapshot import load_snapshot, save_snapshot
+from trees import TreeCache
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,54 +18,161 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the movies/stars sets when loaded
+graph = None
 
-def load_data(directory):
+# Compact graph built from the movies/stars sets for BFS trees and path counts
+# when the data was not loaded in compact mode. Unlike `graph`, it is not
+# used by shortest_path or neighbors_for_person.
+derived_graph = None
+
+# LRU cache of whole BFS trees by source person_id, created by bfs_tree()
+tree_cache = None
+
+# Landmark distance index over the compact graph, loaded by load_landmarks()
+landmark_index = None
+
+# Normalized name index for fuzzy and prefix lookups, built by get_name_index()
+name_index = None
+
+# Row counts, rates and rejected rows of the last load_data() call
+load_stats = None
+
+
+def load_data(directory, compact=False, snapshot=True, progress=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, memory_limit=None):
     """
     Load data from CSV files into memory.
+
+    If compact is True, the people and movies dictionaries only hold names,
+    titles and years, and the links between them are stored in `graph`.
+    With snapshot also True, a binary snapshot of the compact data is read
+    instead of the CSV files when they have not changed since it was saved,
+    and is written after the CSV files are parsed otherwise. people, movies
+    and names are then read-only mappings over the memory-mapped snapshot.
+
+    The files are read chunk_size rows at a time. progress, if given, is
+    called with each file's FileStats as it is read. If the process's peak
+    memory is over memory_limit bytes between two chunks, MemoryError is
+    raised; this stops a load that has gone over the limit, but does not
+    keep it under. Row counts, rates and rejected rows end up in `load_stats`.
     """
+    global people, movies, names, graph, derived_graph, tree_cache
+    global landmark_index, name_index, load_stats
+
+    # Anything built from previously loaded data is out of date
+    derived_graph = None
+    tree_cache = None
+    landmark_index = None
+    name_index = None
+    load_stats = LoadStats()
+    if compact and snapshot:
+        loaded = load_snapshot(directory)
+        if loaded is not None:
+            # Read-only mappings over the snapshot file, so its pages stay shared
+            people, movies, names, graph = loaded
+            return
+    if not isinstance(people, dict):
+        people, movies, names = {}, {}, {}
+    if not compact:
+        # The links are kept in the people and movies dictionaries instead
+        graph = None
+
+    def chunks(filename, columns):
+        return read_chunks(f"{directory}/{filename}", columns, load_stats,
+                           chunk_size, progress, memory_limit)
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+    for chunk in chunks("people.csv", ["id", "name", "birth"]):
+        for person_id, name, birth in chunk:
+            people[person_id] = {
+                "name": name,
+                "birth": birth
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if not compact:
+                people[person_id]["movies"] = set()
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+    for chunk in chunks("movies.csv", ["id", "title", "year"]):
+        for movie_id, title, year in chunk:
+            movies[movie_id] = {
+                "title": title,
+                "year": year
             }
+            if not compact:
+                movies[movie_id]["stars"] = set()
+
+    # Load stars, counting rows that name someone or something we don't know
+    def known_stars():
+        for chunk in chunks("stars.csv", ["person_id", "movie_id"]):
+            starStats = load_stats.files["stars.csv"]
+            for person_id, movie_id in chunk:
+                if person_id not in people:
+                    starStats.reject("unknown person_id")
+                elif movie_id not in movies:
+                    starStats.reject("unknown movie_id")
+                else:
+                    yield person_id, movie_id
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    if compact:
+        graph = Graph.from_edges(people, movies, known_stars())
+        if snapshot:
+            # The snapshot only speeds up later runs, so a read-only
+            # dataset directory is not an error.
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
+                save_snapshot(directory, people, movies, names, graph)
+            except OSError:
                 pass
+        return
+    for person_id, movie_id in known_stars():
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+
+
+def load_landmarks(directory):
+    """
+    Loads the landmark index built by landmarks.py for the compact graph,
+    if there is an up-to-date one in directory. Returns whether it was loaded.
+    """
+    global landmark_index
+
+    if graph is None:
+        return False
+    landmark_index = LandmarkIndex.load(graph, directory)
+    return landmark_index is not None
+
+
+def report_progress(fileStats):
+    """
+    Shows how far through a file load_data is, on one line of stderr.
+    """
+    percent = 100 * fileStats.position / max(fileStats.size, 1)
+    print(f"\r    {fileStats.filename}: {percent:3.0f}%, {fileStats.rows} rows "
+          f"({fileStats.rate():.0f} rows/s)", end="", file=sys.stderr)
+    if fileStats.finished:
+        print(file=sys.stderr)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact, progress=report_progress)
+    if compact:
+        load_landmarks(directory)
+    if load_stats.rejected_rows():
+        print(load_stats, file=sys.stderr)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -84,55 +197,248 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If bidirectional is True, the search expands from both the source
+    and the target and meets in the middle; otherwise a one-sided BFS
+    from the source is used.
+
+    If either person has a cached BFS tree (see bfs_tree), the path is read
+    from the tree instead of searching. With a landmark index loaded, a
+    bidirectional search uses its distance bounds to skip or shorten the
+    search.
+
     If no possible path, returns None.
     """
-    
+    if tree_cache is not None:
+        if source in tree_cache:
+            return tree_cache.get(source).path_to(target)
+        if target in tree_cache:
+            return tree_cache.get(target).path_from(source)
+    if landmark_index is not None and bidirectional:
+        return landmark_index.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional)
+    if bidirectional:
+        return bidirectional_path(source, target)
+    if source == target:
+        return []
+
     start = Node(source, None, None) # Create a Node for the starting person
     goal = Node(target, None, None) # Create a Node for the ending person
     frontier = QueueFrontier() # Create frontier to store Nodes
     frontier.add(start) 
-    exploredNodes = set() # Create a set to keep track of Nodes we have already visited(optimization)
+    exploredNodes = {source} # Create a set to keep track of states we have already visited(optimization)
     shortestPath = [] # Lastly, a list that tells us how we got from start -> goal
     
-    while frontier is not None:
+    while not frontier.empty():
         # Remove the first Node & get a list of all it's children(neighbors)
         currentNode = frontier.remove()
         listOfNeighbors = neighbors_for_person(currentNode.state)
         
         # Loop through the neighbors one by one
         for neighbor in listOfNeighbors:
-            if neighbor not in exploredNodes:
-                # Create a new Node for the neighbor that includes their state, parent, and action
-                # given to us by listOfNeighbors
-                neighborsNode = Node(neighbor[1], currentNode, neighbor[0])
-                # Another optimization where we check to see if the node's state is our goal's state before
-                # we add to the frontier. This saves time because we don't have to wait till the node's turn
-                # before it's checked.
-                if neighborsNode.state == goal.state:
-                    # Back track our way to the starting point so we know the path. This path is then 
-                    # reversed so its in order from start -> goal; not goal -> start.
-                    while neighborsNode.state != start.state:
-                        shortestPath.append((neighborsNode.action, neighborsNode.state))
-                        neighborsNode = neighborsNode.parent
-                    return shortestPath[::-1]
-                # Lastly, if the frontier doesn't already contain the node, we add it to both the frontier
-                # and the explored Nodes.
-                else:
-                    frontier.add(neighborsNode)
-                    exploredNodes.add(neighborsNode)
-    
+            # Create a new Node for the neighbor that includes their state, parent, and action
+            # given to us by listOfNeighbors
+            neighborsNode = Node(neighbor[1], currentNode, neighbor[0])
+            # Another optimization where we check to see if the node's state is our goal's state before
+            # we add to the frontier. This saves time because we don't have to wait till the node's turn
+            # before it's checked.
+            if neighborsNode.state == goal.state:
+                # Back track our way to the starting point so we know the path. This path is then 
+                # reversed so its in order from start -> goal; not goal -> start.
+                while neighborsNode.state != start.state:
+                    shortestPath.append((neighborsNode.action, neighborsNode.state))
+                    neighborsNode = neighborsNode.parent
+                return shortestPath[::-1]
+            # Lastly, if the node's state hasn't been explored yet, we add it to the
+            # frontier and mark it explored, so every state enters the frontier once.
+            elif neighborsNode.state not in exploredNodes:
+                frontier.add(neighborsNode)
+                exploredNodes.add(neighborsNode.state)
+
+    return None
+
+
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both ends.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a person to the (movie_id, person_id) step that reached them
+    # and to their distance from that side's starting person.
+    forwardParents = {source: None}
+    backwardParents = {target: None}
+    forwardDistance = {source: 0}
+    backwardDistance = {target: 0}
+    forwardLayer = [source]
+    backwardLayer = [target]
+
+    while forwardLayer and backwardLayer:
+        # Always grow the smaller frontier; this keeps both searches shallow.
+        forward = len(forwardLayer) <= len(backwardLayer)
+        if forward:
+            layer, parents, distance = forwardLayer, forwardParents, forwardDistance
+            otherDistance = backwardDistance
+        else:
+            layer, parents, distance = backwardLayer, backwardParents, backwardDistance
+            otherDistance = forwardDistance
+
+        # Expand the whole layer before stopping, so the meeting point we keep is
+        # the one with the smallest total distance.
+        nextLayer = []
+        meeting = None
+        bestLength = None
+        for person_id in layer:
+            depth = distance[person_id] + 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                distance[neighbor] = depth
+                nextLayer.append(neighbor)
+                if neighbor in otherDistance:
+                    length = depth + otherDistance[neighbor]
+                    if bestLength is None or length < bestLength:
+                        bestLength = length
+                        meeting = neighbor
+
+        if meeting is not None:
+            return join_paths(meeting, forwardParents, backwardParents)
+
+        if forward:
+            forwardLayer = nextLayer
+        else:
+            backwardLayer = nextLayer
+
+    return None
+
+
+def join_paths(meeting, forwardParents, backwardParents):
+    """
+    Returns the (movie_id, person_id) path through the meeting person,
+    given the parent pointers of a bidirectional search.
+    """
+    path = []
+
+    # Walk back to the source; the steps come out in reverse order.
+    person_id = meeting
+    while forwardParents[person_id] is not None:
+        movie_id, parent = forwardParents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    # Walk on to the target; each step names the person one hop closer to it.
+    person_id = meeting
+    while backwardParents[person_id] is not None:
+        movie_id, child = backwardParents[person_id]
+        path.append((movie_id, child))
+        person_id = child
+
+    return path
+
+
+def compact_graph():
+    """
+    Returns the compact graph, building it from the people dictionary
+    if the data was not loaded in compact mode. A graph built here is kept
+    in `derived_graph`, so other lookups stay on the dictionaries.
+    """
+    global derived_graph
+
+    if graph is not None:
+        return graph
+    if derived_graph is None:
+        derived_graph = Graph.from_edges(
+            people, movies,
+            ((person_id, movie_id)
+             for person_id, person in people.items()
+             for movie_id in person["movies"])
+        )
+    return derived_graph
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many different shortest lists of (movie_id, person_id)
+    pairs connect the source to the target, counted layer by layer
+    rather than by listing them.
+    """
+    return compact_graph().count_shortest_paths(source, target)
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that connects
+    the source to the target, lazily, stopping after limit paths if given.
+    """
+    paths = compact_graph().all_shortest_paths(source, target)
+    return paths if limit is None else itertools.islice(paths, limit)
+
+
+def bfs_tree(source, budget=None):
+    """
+    Returns the BFS tree of every person's distance and path from source,
+    computing it on first use and caching it for later shortest_path calls.
+
+    Trees are evicted least recently used first once they take up more than
+    budget bytes (a default budget is used when it is first None).
+    """
+    global tree_cache
+
+    if tree_cache is None:
+        # Trees are stored as integer arrays, so they need the compact graph
+        compact = compact_graph()
+        tree_cache = TreeCache(compact) if budget is None else TreeCache(compact, budget)
+    elif budget is not None:
+        tree_cache.budget = budget
+    return tree_cache.get(source)
+
+
+def distance_histogram(source):
+    """
+    Returns a dictionary mapping each degree of separation from source
+    to the number of people at it. Unreachable people are counted under None.
+    """
+    return bfs_tree(source).histogram()
+
+
+def get_name_index():
+    """
+    Returns the name index of everyone in people, building it on first use.
+    """
+    global name_index
+
+    if name_index is None or len(name_index.keys) != len(people):
+        name_index = NameIndex(people)
+    return name_index
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names without an exact match are looked up in the name index, which
+    ignores accents and punctuation and allows one typo. A trailing birth
+    year, as in "Kevin Bacon (1958)", picks between people with one name.
     """
+    name, birth = split_birth(name)
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) == 0:
+        person_ids = get_name_index().search(name)
+    if birth is not None:
+        person_ids = [person_id for person_id in person_ids
+                      if people[person_id]["birth"] == birth]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -158,6 +464,8 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
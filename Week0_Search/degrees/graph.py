@@ -0,0 +1,300 @@
+"""
+Compact, integer-indexed graph of people and movies.
+
+People and movies are numbered 0..n-1 in the order they were loaded. The
+adjacency lists are stored in CSR (compressed sparse row) form: the movies
+of person p are person_movies[person_offsets[p]:person_offsets[p + 1]], and
+the stars of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+Searches run entirely on these integers and only translate back to IMDb ids
+for the path they return.
+"""
+
+from array import array
+
+# Typecode for every integer array in the graph
+TYPECODE = "i"
+
+
+def compress(count, rows, columns):
+    """
+    Returns (offsets, values) CSR arrays for the given edges, grouping each
+    column value under its row. rows and columns are parallel sequences.
+    """
+    offsets = array(TYPECODE, [0]) * (count + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    # Fill each row's slice from its start, using a moving cursor per row
+    cursor = array(TYPECODE, offsets[:-1])
+    values = array(TYPECODE, [0]) * len(rows)
+    for row, column in zip(rows, columns):
+        values[cursor[row]] = column
+        cursor[row] += 1
+    return offsets, values
+
+
+class Graph():
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_stars, person_index=None, movie_index=None):
+        # Dense index -> IMDb id, and the reverse lookups, built here unless
+        # given as mappings (such as the ones a snapshot maps from its file)
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+
+        # CSR adjacency for person -> movies and movie -> stars
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edges):
+        """
+        Builds a graph from lists of IMDb ids and an iterable of
+        (person_id, movie_id) pairs. Pairs naming an unknown id are skipped.
+        """
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        people = array(TYPECODE)
+        movies = array(TYPECODE)
+        for person_id, movie_id in edges:
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                continue
+            people.append(person)
+            movies.append(movie)
+
+        person_offsets, person_movies = compress(len(person_ids), people, movies)
+        movie_offsets, movie_stars = compress(len(movie_ids), movies, people)
+        return cls(list(person_ids), list(movie_ids), person_offsets,
+                   person_movies, movie_offsets, movie_stars)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices of a person index.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices of a movie index.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def expand(self, layer, parents):
+        """
+        Returns the people first reached from a BFS layer, recording a
+        (movie, person) parent step for each of them in parents.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        nextLayer = []
+        for person in layer:
+            for movie in person_movies[person_offsets[person]:person_offsets[person + 1]]:
+                for neighbor in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                    if neighbor not in parents:
+                        parents[neighbor] = (movie, person)
+                        nextLayer.append(neighbor)
+        return nextLayer
+
+    def shortest_path(self, source, target, bidirectional=True):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target IMDb ids.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if bidirectional:
+            path = self.bidirectional_path(source, target)
+        else:
+            path = self.forward_path(source, target)
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def forward_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs from source
+        to target using a one-sided BFS, or None if they are not connected.
+        """
+        parents = {source: None}
+        layer = [source]
+        while layer and target not in parents:
+            layer = self.expand(layer, parents)
+        if target not in parents:
+            return None
+        return self.walk(target, parents)[::-1]
+
+    def bidirectional_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs from source
+        to target, expanding BFS layers from both ends, or None if they are
+        not connected.
+        """
+        if source == target:
+            return []
+
+        forwardParents = {source: None}
+        backwardParents = {target: None}
+        forwardDepth = {source: 0}
+        backwardDepth = {target: 0}
+        forwardLayer = [source]
+        backwardLayer = [target]
+
+        while forwardLayer and backwardLayer:
+            # Grow the smaller side by a whole layer
+            forward = len(forwardLayer) <= len(backwardLayer)
+            if forward:
+                parents, depth, otherDepth = forwardParents, forwardDepth, backwardDepth
+                layer = forwardLayer
+            else:
+                parents, depth, otherDepth = backwardParents, backwardDepth, forwardDepth
+                layer = backwardLayer
+
+            nextLayer = self.expand(layer, parents)
+            newDepth = depth[layer[0]] + 1
+            meeting = None
+            for person in nextLayer:
+                depth[person] = newDepth
+                if person in otherDepth and (
+                    meeting is None or otherDepth[person] < otherDepth[meeting]
+                ):
+                    meeting = person
+            if meeting is not None:
+                path = self.walk(meeting, forwardParents)[::-1]
+                person = meeting
+                while backwardParents[person] is not None:
+                    movie, child = backwardParents[person]
+                    path.append((movie, child))
+                    person = child
+                return path
+
+            if forward:
+                forwardLayer = nextLayer
+            else:
+                backwardLayer = nextLayer
+
+        return None
+
+    def distances_from(self, root, stop=None):
+        """
+        Returns a dictionary of BFS distances from a root person index.
+        If stop is given, the search ends with the layer that reaches it.
+        """
+        distance = {root: 0}
+        layer = [root]
+        depth = 0
+        while layer and (stop is None or stop not in distance):
+            depth += 1
+            nextLayer = []
+            for person in layer:
+                for movie in self.movies_of(person):
+                    for neighbor in self.stars_of(movie):
+                        if neighbor not in distance:
+                            distance[neighbor] = depth
+                            nextLayer.append(neighbor)
+            layer = nextLayer
+        return distance
+
+    def predecessors(self, person, distance):
+        """
+        Returns the (movie, person) steps into person from people one layer
+        closer to the root of distance. Each step is one shortest-path edge.
+        """
+        closer = distance[person] - 1
+        return [(movie, neighbor)
+                for movie in set(self.movies_of(person))
+                for neighbor in set(self.stars_of(movie))
+                if distance.get(neighbor) == closer]
+
+    def count_shortest_paths(self, source_id, target_id):
+        """
+        Returns how many different shortest lists of (movie_id, person_id)
+        pairs connect the source to the target, without building any of them.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        distance = self.distances_from(source, stop=target)
+        if target not in distance:
+            return 0
+
+        # Paths into a person are the sum of paths into each of its predecessors;
+        # fill the counts in layer order, starting from the source.
+        counts = {source: 1}
+        layer = {target}
+        layers = []
+        while distance[next(iter(layer))] > 0:
+            layers.append(layer)
+            layer = {parent for person in layer
+                     for _, parent in self.predecessors(person, distance)}
+        for layer in reversed(layers):
+            for person in layer:
+                counts[person] = sum(counts[parent]
+                                     for _, parent in self.predecessors(person, distance))
+        return counts[target]
+
+    def all_shortest_paths(self, source_id, target_id):
+        """
+        Yields every shortest list of (movie_id, person_id) pairs that
+        connects the source to the target, one at a time.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        distance = self.distances_from(source, stop=target)
+        if target not in distance:
+            return
+
+        # Predecessors are remembered per person, so the memory used grows with
+        # the people on shortest paths rather than with the number of paths.
+        steps = {}
+
+        def paths_to(person):
+            if person == source:
+                yield ()
+                return
+            if person not in steps:
+                steps[person] = self.predecessors(person, distance)
+            for movie, parent in steps[person]:
+                for path in paths_to(parent):
+                    yield path + ((movie, person),)
+
+        for path in paths_to(target):
+            yield [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def walk(self, person, parents):
+        """
+        Returns the (movie, person) steps from person back to the root of
+        parents, in the order they are walked.
+        """
+        steps = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            steps.append((movie, person))
+            person = parent
+        return steps
@@ -0,0 +1,311 @@
+"""
+Landmark distance index for the compact degrees graph.
+
+A handful of well-connected people are chosen as landmarks, and the BFS
+distance from each landmark to every person is stored as an array. By the
+triangle inequality, for any landmark L:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+so the index gives bounds on any pair's separation without searching. When
+the bounds meet, a shortest path runs through a landmark and is read off the
+distance arrays directly; otherwise the search falls back to a bidirectional
+BFS. The lower bound is also an admissible heuristic for an A* search (ALT),
+available as alt_path.
+
+Usage: python landmarks.py directory [count]
+"""
+
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+from snapshot import READ_ERRORS, source_signature
+from trees import BFSTree
+
+# Name of the index file, stored next to the CSV files
+FILENAME = "degrees.landmarks"
+
+# Version tag at the start of the file; bump it whenever the layout changes
+MAGIC = b"LANDMRK1"
+
+# Typecode of the distance arrays; -1 marks an unreachable person
+DISTANCE_TYPECODE = "h"
+
+# Number of landmarks built by default
+DEFAULT_COUNT = 16
+
+
+def choose_landmarks(graph, count):
+    """
+    Returns the person indices of the count people with the most co-stars.
+    """
+    def costars(person):
+        return sum(graph.movie_offsets[movie + 1] - graph.movie_offsets[movie] - 1
+                   for movie in graph.movies_of(person))
+    return heapq.nlargest(count, range(len(graph.person_ids)), key=costars)
+
+
+class LandmarkIndex():
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        # Person indices of the landmarks, and each one's distance array
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=DEFAULT_COUNT):
+        """
+        Builds an index by running a full BFS from each chosen landmark.
+        """
+        landmarks = choose_landmarks(graph, count)
+        distances = [BFSTree(graph, graph.person_ids[landmark]).distance
+                     for landmark in landmarks]
+        return cls(graph, landmarks, distances)
+
+    def save(self, directory):
+        """
+        Writes the index to directory, alongside the CSV files it was built from.
+        """
+        metadata = pickle.dumps({
+            "sources": source_signature(directory),
+            "byteorder": sys.byteorder,
+            "people": len(self.graph.person_ids),
+            "landmarks": [self.graph.person_ids[landmark] for landmark in self.landmarks]
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        path = os.path.join(directory, FILENAME)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<Q", len(metadata)))
+                f.write(metadata)
+                f.write(bytes(-f.tell() % 8))
+                for distance in self.distances:
+                    distance.tofile(f)
+            os.replace(temporary, path)
+        finally:
+            # Only left behind if writing or renaming it failed
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def load(cls, graph, directory):
+        """
+        Returns the index saved in directory with its distance arrays
+        memory-mapped, or None if there is none, it is out of date, or it
+        cannot be read, such as one cut short.
+        """
+        path = os.path.join(directory, FILENAME)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        try:
+            with f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                length, = struct.unpack("<Q", f.read(8))
+                metadata = pickle.loads(f.read(length))
+                if (metadata["sources"] != source_signature(directory)
+                        or metadata["byteorder"] != sys.byteorder
+                        or metadata["people"] != len(graph.person_ids)):
+                    return None
+                start = f.tell() + (-f.tell() % 8)
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            view = memoryview(buffer)
+            size = metadata["people"] * array(DISTANCE_TYPECODE).itemsize
+            if start + len(metadata["landmarks"]) * size > len(view):
+                return None
+            distances = []
+            for _ in metadata["landmarks"]:
+                distances.append(view[start:start + size].cast(DISTANCE_TYPECODE))
+                start += size
+            landmarks = [graph.person_index[person_id] for person_id in metadata["landmarks"]]
+        except READ_ERRORS:
+            return None
+        return cls(graph, landmarks, distances)
+
+    def bounds(self, source_id, target_id):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people. upper is None when no landmark reaches both of them, and
+        (None, None) means they are certainly not connected.
+        """
+        source = self.graph.person_index[source_id]
+        target = self.graph.person_index[target_id]
+        lower, upper, _ = self.index_bounds(source, target)
+        return lower, upper
+
+    def index_bounds(self, source, target):
+        """
+        Returns (lower, upper, via) for person indices, where lower and upper
+        are as in bounds() and via is the position of the landmark giving the
+        upper bound.
+        """
+        lower = 0
+        upper = None
+        via = None
+        for i, distance in enumerate(self.distances):
+            s = distance[source]
+            t = distance[target]
+            if s < 0 and t < 0:
+                continue
+            if s < 0 or t < 0:
+                # One person is in the landmark's component and the other is not
+                return None, None, None
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+                via = i
+        return lower, upper, via
+
+    def descend(self, person, distance):
+        """
+        Returns the (movie, person) steps from person to the landmark whose
+        distance array is given, always moving to someone one step closer.
+        """
+        graph = self.graph
+        steps = []
+        while distance[person] > 0:
+            closer = distance[person] - 1
+            step = next((movie, neighbor)
+                        for movie in graph.movies_of(person)
+                        for neighbor in graph.stars_of(movie)
+                        if distance[neighbor] == closer)
+            steps.append(step)
+            person = step[1]
+        return steps
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        People the index shows to be disconnected are answered at once, and so
+        are pairs whose bounds meet, by walking through the landmark. All other
+        pairs are searched with a bidirectional BFS.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if source == target:
+            return []
+        lower, upper, via = self.index_bounds(source, target)
+        if lower is None:
+            return None
+
+        if lower == upper:
+            distance = self.distances[via]
+            path = self.descend(source, distance)
+            # Walk from the target to the landmark, then replay it backwards
+            steps = self.descend(target, distance)
+            people = [target] + [person for _, person in steps]
+            for i in range(len(steps) - 1, -1, -1):
+                path.append((steps[i][0], people[i]))
+        else:
+            path = graph.bidirectional_path(source, target)
+            if path is None:
+                return None
+        return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+    def alt_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using an A* search guided
+        by the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if source == target:
+            return []
+        lower, upper, _ = self.index_bounds(source, target)
+        if lower is None:
+            return None
+
+        # Precompute the target's column so the heuristic is one pass per person
+        columns = [(distance, distance[target]) for distance in self.distances]
+
+        def heuristic(person):
+            estimate = 0
+            for distance, t in columns:
+                d = distance[person]
+                if d < 0:
+                    if t >= 0:
+                        return None
+                elif t >= 0:
+                    gap = d - t if d > t else t - d
+                    if gap > estimate:
+                        estimate = gap
+            return estimate
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+
+        parents = {source: None}
+        cost = {source: 0}
+        closed = set()
+        heap = [(lower, 0, source)]
+        while heap:
+            _, depth, person = heapq.heappop(heap)
+            if person in closed:
+                continue
+            if person == target:
+                path = []
+                while parents[person] is not None:
+                    movie, parent = parents[person]
+                    path.append((graph.movie_ids[movie], graph.person_ids[person]))
+                    person = parent
+                return path[::-1]
+            closed.add(person)
+
+            depth += 1
+            for movie in person_movies[person_offsets[person]:person_offsets[person + 1]]:
+                for neighbor in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                    if neighbor in closed or cost.get(neighbor, depth + 1) <= depth:
+                        continue
+                    estimate = heuristic(neighbor)
+                    # Skip people who cannot reach the target, or cannot beat the upper bound
+                    if estimate is None or (upper is not None and depth + estimate > upper):
+                        continue
+                    cost[neighbor] = depth
+                    parents[neighbor] = (movie, person)
+                    heapq.heappush(heap, (depth + estimate, depth, neighbor))
+        return None
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else DEFAULT_COUNT
+
+    # Imported here because degrees imports this module
+    import degrees
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print(f"Building {count} landmarks...")
+    index = LandmarkIndex.build(degrees.graph, count)
+    index.save(directory)
+    for landmark in index.landmarks:
+        print(f"    {degrees.people[degrees.graph.person_ids[landmark]]['name']}")
+    print(f"Saved {os.path.join(directory, FILENAME)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Chunked CSV reading for the degrees dataset.
+
+Rows are parsed with csv.reader rather than csv.DictReader, so no dictionary
+is built per row, and handed out in fixed-size chunks of tuples holding only
+the columns asked for. Only one chunk is alive at a time, so parsing memory
+stays bounded however large the file is. Every file's row count, row rate
+and rejected rows (by reason) are recorded in a LoadStats.
+"""
+
+import csv
+import os
+import sys
+import time
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Rows per chunk
+DEFAULT_CHUNK_SIZE = 50000
+
+# Minimum seconds between two progress callbacks for the same file
+PROGRESS_INTERVAL = 0.5
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in bytes,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class FileStats():
+    def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size
+        # Bytes of the file the parser has taken so far
+        self.position = 0
+        self.finished = False
+        self.rows = 0
+        # Maps a reason to the number of rows rejected for it
+        self.rejected = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def rejected_rows(self):
+        return sum(self.rejected.values())
+
+    def rate(self):
+        """
+        Returns the rows read per second so far.
+        """
+        return self.rows / max(self.seconds, 1e-9)
+
+    def __str__(self):
+        text = f"{self.filename}: {self.rows} rows in {self.seconds:.2f}s ({self.rate():.0f} rows/s)"
+        if self.rejected:
+            reasons = ", ".join(f"{count} {reason}" for reason, count in self.rejected.items())
+            text += f", rejected {reasons}"
+        return text
+
+
+class LoadStats():
+    def __init__(self):
+        # Maps a filename to its FileStats, in the order files were read
+        self.files = {}
+        self.peak_memory = None
+
+    def start(self, path):
+        stats = FileStats(os.path.basename(path), os.path.getsize(path))
+        self.files[stats.filename] = stats
+        return stats
+
+    def rejected_rows(self):
+        return sum(stats.rejected_rows() for stats in self.files.values())
+
+    def __str__(self):
+        lines = [str(stats) for stats in self.files.values()]
+        if self.peak_memory is not None:
+            lines.append(f"peak memory: {self.peak_memory / 2 ** 20:.0f} MiB")
+        return "\n".join(lines)
+
+
+def decoded_lines(raw, fileStats):
+    """
+    Yields the lines of a binary file as text, adding the bytes of each
+    line to fileStats.position as the CSV parser takes it. Unlike the file's
+    own position, this does not run ahead by a read buffer.
+    """
+    for line in raw:
+        fileStats.position += len(line)
+        yield line.decode("utf-8")
+
+
+def read_chunks(path, columns, stats, chunk_size=DEFAULT_CHUNK_SIZE,
+                progress=None, memory_limit=None):
+    """
+    Yields lists of up to chunk_size tuples, one per row of the CSV file at
+    path, holding the named columns in order. Rows too short to have every
+    column are rejected as "malformed".
+
+    progress, if given, is called with the file's FileStats every
+    PROGRESS_INTERVAL seconds and once at the end, with finished set.
+
+    memory_limit is a check rather than a cap: before each chunk is read,
+    MemoryError is raised if the process's peak memory so far is over
+    memory_limit bytes. The load stops at the first chunk boundary after
+    the limit is passed, so the peak can exceed it by up to a chunk.
+    """
+    fileStats = stats.start(path)
+    with open(path, "rb") as raw:
+        reader = csv.reader(decoded_lines(raw, fileStats))
+        header = next(reader, [])
+        for column in columns:
+            if column not in header:
+                raise ValueError(f"{path} has no {column} column")
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        pick = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+
+        lastReport = time.perf_counter()
+        while True:
+            if memory_limit is not None:
+                peak = peak_memory()
+                if peak is not None and peak > memory_limit:
+                    raise MemoryError(
+                        f"loading {fileStats.filename} used {peak / 2 ** 20:.0f} MiB, "
+                        f"over the {memory_limit / 2 ** 20:.0f} MiB limit"
+                    )
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+            chunk = []
+            for row in rows:
+                if not row:
+                    # Blank line, which DictReader also skips
+                    continue
+                fileStats.rows += 1
+                if len(row) < width:
+                    fileStats.reject("malformed")
+                else:
+                    chunk.append(pick(row))
+            del rows
+            yield chunk
+
+            now = time.perf_counter()
+            fileStats.seconds = now - fileStats.started
+            if progress is not None and now - lastReport >= PROGRESS_INTERVAL:
+                progress(fileStats)
+                lastReport = now
+
+    fileStats.finished = True
+    fileStats.seconds = time.perf_counter() - fileStats.started
+    stats.peak_memory = peak_memory()
+    if progress is not None:
+        progress(fileStats)
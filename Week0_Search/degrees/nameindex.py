@@ -0,0 +1,180 @@
+"""
+Name index for looking people up by normalized, prefix or misspelled names.
+
+Names are normalized (accents stripped, case folded, punctuation removed,
+whitespace collapsed) and kept in one sorted array, so every person sharing
+a name sits in one contiguous run. A dictionary maps each normalized name to
+the start of its run for exact lookups, prefixes are found by bisection, and
+a name with one typo is found through a deletion index (as in SymSpell):
+the hash of every string one deleted character away from a name points back
+to that name, so a lookup only generates the query's own deletions, one per
+character, however many different characters the names use. Names sharing
+a deletion with the query are checked for really being one edit away.
+
+A query may end with a birth year in parentheses, as in "Kevin Bacon (1958)",
+to choose between people who share a name.
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+# Trailing "(YYYY)" birth year in a query
+BIRTH = re.compile(r"\s*\((\d{4})\)\s*$")
+
+
+def normalize(name):
+    """
+    Returns a name with accents stripped, case folded, punctuation
+    removed and whitespace collapsed.
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).casefold()
+    name = "".join(c if c.isalnum() else " " for c in name)
+    return " ".join(name.split())
+
+
+def split_birth(query):
+    """
+    Returns (name, birth) for a query, where birth is the year in a trailing
+    "(YYYY)" or None.
+    """
+    match = BIRTH.search(query)
+    if match is None:
+        return query, None
+    return query[:match.start()], match.group(1)
+
+
+def deletions(key):
+    """
+    Returns every string one deleted character away from key.
+    """
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def one_edit(a, b):
+    """
+    Returns True if a and b differ by at most one deletion, insertion,
+    substitution or transposition of neighbours.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return (a[i + 1:] == b[i + 1:]
+            or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2] and a[i + 2:] == b[i + 2:]))
+
+
+class NameIndex():
+    def __init__(self, people):
+        self.people = people
+        entries = sorted((normalize(person["name"]), person_id)
+                         for person_id, person in people.items())
+        self.keys = [key for key, _ in entries]
+        self.person_ids = [person_id for _, person_id in entries]
+
+        # Maps each normalized name to the start of its run in keys
+        self.starts = {}
+        for i in range(len(self.keys) - 1, -1, -1):
+            self.starts[self.keys[i]] = i
+
+        # Every deletion of every normalized name, packed into one sorted
+        # int array as the deletion's hash above the start of the name's run
+        # in the low shift bits. Names found through a hash are checked with
+        # one_edit, so a truncated hash colliding only costs a comparison.
+        self.shift = max(len(self.keys), 1).bit_length()
+        self.mask = (1 << (63 - self.shift)) - 1
+        self.deleted = array("q", sorted(
+            (hash(variant) & self.mask) << self.shift | start
+            for key, start in self.starts.items()
+            for variant in deletions(key)
+        ))
+
+    def exact(self, key):
+        """
+        Returns the person_ids whose normalized name is exactly key.
+        """
+        start = self.starts.get(key)
+        if start is None:
+            return []
+        end = start
+        while end < len(self.keys) and self.keys[end] == key:
+            end += 1
+        return self.person_ids[start:end]
+
+    def near(self, key):
+        """
+        Returns the normalized names one deletion, insertion, substitution
+        or transposition away from key.
+        """
+        deleted = self.deleted
+        low = (1 << self.shift) - 1
+        starts = set()
+        for variant in deletions(key) | {key}:
+            # A name the query has an extra character over
+            if variant in self.starts:
+                starts.add(self.starts[variant])
+            # A name one character longer, or sharing a deletion with the query
+            hashed = hash(variant) & self.mask
+            i = bisect_left(deleted, hashed << self.shift)
+            while i < len(deleted) and deleted[i] >> self.shift == hashed:
+                starts.add(deleted[i] & low)
+                i += 1
+        near = {self.keys[start] for start in starts}
+        near.discard(key)
+        return {name for name in near if one_edit(key, name)}
+
+    def search(self, query, birth=None):
+        """
+        Returns the person_ids matching a name. Exact normalized matches are
+        preferred; if there are none, names one typo away are returned.
+        If birth is given, only people born that year are kept.
+        """
+        key = normalize(query)
+        person_ids = self.exact(key)
+        if not person_ids:
+            for name in sorted(self.near(key)):
+                person_ids.extend(self.exact(name))
+        if birth is not None:
+            person_ids = [person_id for person_id in person_ids
+                          if self.people[person_id]["birth"] == birth]
+        return person_ids
+
+    def prefix(self, query, limit=10):
+        """
+        Returns up to limit person_ids whose normalized name starts with query,
+        in name order.
+        """
+        key = normalize(query)
+        person_ids = []
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and len(person_ids) < limit and self.keys[i].startswith(key):
+            person_ids.append(self.person_ids[i])
+            i += 1
+        return person_ids
+
+    def resolve(self, query, limit=10):
+        """
+        Returns (person_id, error) for a name, optionally followed by a birth
+        year in parentheses, without prompting. error describes a miss or
+        up to limit candidates of an ambiguous name.
+        """
+        name, birth = split_birth(query)
+        person_ids = self.search(name, birth)
+        if len(person_ids) == 1:
+            return person_ids[0], None
+        elif len(person_ids) == 0:
+            return None, f"person not found: {query}"
+        candidates = ", ".join(
+            f"{person_id} ({self.people[person_id]['name']}, {self.people[person_id]['birth'] or '?'})"
+            for person_id in person_ids[:limit]
+        )
+        if len(person_ids) > limit:
+            candidates += f", ... and {len(person_ids) - limit} more"
+        return None, f"ambiguous name: {query} [{candidates}]"
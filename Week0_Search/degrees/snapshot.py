@@ -0,0 +1,323 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+A snapshot file holds a short header, a small pickle describing the file,
+and then a run of flat arrays: the graph's CSR arrays, and the people,
+movies and names tables stored as UTF-8 strings with their end offsets.
+Everything after the header is memory-mapped when the snapshot is loaded,
+so it is paged in lazily and its pages are shared by every process that
+maps the file. The people, movies and names dictionaries are replaced by
+read-only mappings over those arrays, which decode a record only when it
+is looked up.
+
+The snapshot records the size and modification time of each CSV file it
+was built from, and is ignored once any of them change. A snapshot that
+cannot be read, such as one cut short, is ignored too.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+from graph import Graph, TYPECODE
+
+# Name of the snapshot file, stored next to the CSV files
+FILENAME = "degrees.snapshot"
+
+# Version tag at the start of the file; bump it whenever the layout changes
+MAGIC = b"DEGREES2"
+
+# CSV files the snapshot depends on
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph arrays, in the order they are laid out after the pickle
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+
+# Fields of the people and movies records, stored as string tables
+PERSON_FIELDS = ["name", "birth"]
+MOVIE_FIELDS = ["title", "year"]
+
+# Typecode of the end offsets of a string table, which may pass 2^31 bytes
+OFFSET_TYPECODE = "q"
+
+# Arrays start on a multiple of this many bytes
+ALIGNMENT = 8
+
+# What a snapshot cut short or corrupted can raise while being read
+READ_ERRORS = (EOFError, IndexError, KeyError, TypeError, ValueError,
+               pickle.UnpicklingError, struct.error)
+
+
+class StringTable(Sequence):
+    """
+    A read-only sequence of strings stored back to back as UTF-8, with the
+    end offset of each one.
+    """
+
+    def __init__(self, ends, data):
+        self.ends = ends
+        self.data = data
+
+    @classmethod
+    def build(cls, strings):
+        ends = array(OFFSET_TYPECODE)
+        chunks = []
+        end = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            end += len(chunk)
+            ends.append(end)
+        return cls(ends, b"".join(chunks))
+
+    def __len__(self):
+        return len(self.ends)
+
+    def raw(self, i):
+        """
+        Returns the UTF-8 bytes of string i.
+        """
+        start = self.ends[i - 1] if i else 0
+        return bytes(self.data[start:self.ends[i]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.raw(i).decode("utf-8")
+
+
+class SortedIndex(Mapping):
+    """
+    A read-only mapping from each string of a table to its position,
+    found by binary search over the positions in string order. UTF-8 bytes
+    sort in the same order as the strings they encode, so the search
+    compares bytes without decoding them.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def find(self, key):
+        """
+        Returns the position of key in the table, or None.
+        """
+        if not isinstance(key, str):
+            return None
+        key = key.encode("utf-8")
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.table.raw(self.order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self.table.raw(self.order[low]) == key:
+            return self.order[low]
+        return None
+
+    def __getitem__(self, key):
+        position = self.find(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+class Records(Mapping):
+    """
+    A read-only mapping from IMDb id to a dictionary of fields, like the
+    people and movies dictionaries, with each field kept in a string table.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, key):
+        row = self.index[key]
+        return {field: table[row] for field, table in self.fields.items()}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Names(Mapping):
+    """
+    A read-only mapping from a lowercase name to the set of person_ids
+    with that name, like the names dictionary.
+    """
+
+    def __init__(self, keys, ends, people, person_ids):
+        self.keys = SortedIndex(keys, range(len(keys)))
+        self.ends = ends
+        # Row of each person, grouped by name in key order
+        self.people = people
+        self.person_ids = person_ids
+
+    def __getitem__(self, key):
+        i = self.keys[key]
+        start = self.ends[i - 1] if i else 0
+        return {self.person_ids[row] for row in self.people[start:self.ends[i]]}
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def source_signature(directory):
+    """
+    Returns the (size, mtime) of each CSV file in directory.
+    """
+    signature = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature[filename] = (stat.st_size, stat.st_mtime_ns)
+    return signature
+
+
+def snapshot_arrays(people, movies, names, graph):
+    """
+    Returns the (name, typecode, data) of every array a snapshot holds.
+    """
+    person_ids = list(people)
+    movie_ids = list(movies)
+    row = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    sections = [(name, TYPECODE, getattr(graph, name)) for name in ARRAYS]
+
+    def strings(name, values):
+        table = StringTable.build(values)
+        sections.append((f"{name}_ends", OFFSET_TYPECODE, table.ends))
+        sections.append((f"{name}_data", "B", table.data))
+        return values
+
+    def records(name, ids, dictionary, fields):
+        strings(f"{name}_id", ids)
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        sections.append((f"{name}_order", TYPECODE, array(TYPECODE, order)))
+        for field in fields:
+            strings(f"{name}_{field}", [dictionary[key][field] for key in ids])
+
+    records("person", person_ids, people, PERSON_FIELDS)
+    records("movie", movie_ids, movies, MOVIE_FIELDS)
+
+    keys = strings("name_key", sorted(names))
+    ends = array(OFFSET_TYPECODE)
+    rows = array(TYPECODE)
+    for key in keys:
+        rows.extend(sorted(row[person_id] for person_id in names[key]))
+        ends.append(len(rows))
+    sections.append(("name_ends", OFFSET_TYPECODE, ends))
+    sections.append(("name_people", TYPECODE, rows))
+    return sections
+
+
+def save_snapshot(directory, people, movies, names, graph):
+    """
+    Writes a snapshot of the dataset loaded from directory.
+    """
+    sections = snapshot_arrays(people, movies, names, graph)
+    metadata = pickle.dumps({
+        "sources": source_signature(directory),
+        "byteorder": sys.byteorder,
+        "itemsizes": {typecode: struct.calcsize(typecode) for typecode in (TYPECODE, OFFSET_TYPECODE)},
+        "sections": [(name, typecode, len(data)) for name, typecode, data in sections]
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Write to a temporary file first so readers never see a partial snapshot
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(metadata)))
+            f.write(metadata)
+            for name, typecode, data in sections:
+                f.write(bytes(-f.tell() % ALIGNMENT))
+                f.write(data)
+        os.replace(temporary, path)
+    finally:
+        # Only left behind if writing or renaming it failed
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load_snapshot(directory):
+    """
+    Returns (people, movies, names, graph) from the snapshot in directory,
+    or None if there is no readable, up-to-date snapshot.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    try:
+        with f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            length, = struct.unpack("<Q", f.read(8))
+            metadata = pickle.loads(f.read(length))
+            itemsizes = {typecode: struct.calcsize(typecode) for typecode in (TYPECODE, OFFSET_TYPECODE)}
+            if (metadata["sources"] != source_signature(directory)
+                    or metadata["byteorder"] != sys.byteorder
+                    or metadata["itemsizes"] != itemsizes):
+                return None
+            start = f.tell()
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Slice each array out of the mapping without copying it
+        view = memoryview(buffer)
+        arrays = {}
+        for name, typecode, count in metadata["sections"]:
+            start += -start % ALIGNMENT
+            end = start + count * struct.calcsize(typecode)
+            if end > len(view):
+                return None
+            arrays[name] = view[start:end].cast(typecode)
+            start = end
+    except READ_ERRORS:
+        return None
+
+    def strings(name):
+        return StringTable(arrays[f"{name}_ends"], arrays[f"{name}_data"])
+
+    def records(name, fields):
+        index = SortedIndex(strings(f"{name}_id"), arrays[f"{name}_order"])
+        return Records(index, {field: strings(f"{name}_{field}") for field in fields})
+
+    people = records("person", PERSON_FIELDS)
+    movies = records("movie", MOVIE_FIELDS)
+    names = Names(strings("name_key"), arrays["name_ends"], arrays["name_people"],
+                  people.index.table)
+    graph = Graph(people.index.table, movies.index.table,
+                  *(arrays[name] for name in ARRAYS),
+                  person_index=people.index, movie_index=movies.index)
+    return people, movies, names, graph
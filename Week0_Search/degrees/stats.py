@@ -0,0 +1,188 @@
+"""
+Graph-wide separation statistics for a degrees dataset.
+
+Computes the connected components and their sizes, bounds the diameter of
+the largest component with repeated double-sweep BFS, and estimates the
+average degree of separation from a sample of full BFS runs, spread over a
+pool of processes. The results are written to a JSON file.
+
+Usage: python stats.py directory [output] [--samples N] [--workers N] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+import degrees
+from batch import process_pool
+from graph import TYPECODE
+from trees import BFSTree
+
+# Default output file, written inside the dataset directory
+DEFAULT_OUTPUT = "degrees.stats.json"
+
+# Number of double sweeps used to bound the diameter
+SWEEPS = 4
+
+
+def components(graph):
+    """
+    Returns (labels, sizes): the component number of every person index,
+    and the size of each component, largest first.
+    """
+    count = len(graph.person_ids)
+    labels = array(TYPECODE, [-1]) * count
+    sizes = []
+    for root in range(count):
+        if labels[root] >= 0:
+            continue
+        label = len(sizes)
+        labels[root] = label
+        layer = [root]
+        size = 1
+        while layer:
+            nextLayer = []
+            for person in layer:
+                for movie in graph.movies_of(person):
+                    for neighbor in graph.stars_of(movie):
+                        if labels[neighbor] < 0:
+                            labels[neighbor] = label
+                            nextLayer.append(neighbor)
+            size += len(nextLayer)
+            layer = nextLayer
+        sizes.append(size)
+
+    # Renumber so that component 0 is the largest
+    order = sorted(range(len(sizes)), key=lambda label: -sizes[label])
+    rank = array(TYPECODE, [0]) * len(sizes)
+    for i, label in enumerate(order):
+        rank[label] = i
+    for person in range(count):
+        labels[person] = rank[labels[person]]
+    return labels, [sizes[label] for label in order]
+
+
+def farthest(graph, person_id):
+    """
+    Returns (person_id, distance) of someone as far as possible from a person.
+    """
+    distance = BFSTree(graph, person_id).distance
+    person = max(range(len(distance)), key=distance.__getitem__)
+    return graph.person_ids[person], distance[person]
+
+
+def diameter_bounds(graph, members, sweeps=SWEEPS):
+    """
+    Returns (lower, upper) bounds on the diameter of the component holding
+    the given person indices, using double-sweep BFS from random members.
+    """
+    lower = 0
+    upper = None
+    for _ in range(sweeps):
+        start = graph.person_ids[random.choice(members)]
+        far, eccentricity = farthest(graph, start)
+        # Every pair is within 2 * ecc(start) of each other
+        upper = 2 * eccentricity if upper is None else min(upper, 2 * eccentricity)
+        _, distance = farthest(graph, far)
+        lower = max(lower, distance)
+    return lower, upper
+
+
+def sample_histogram(person_id):
+    """
+    Returns a {distance: people} histogram of a full BFS from a person,
+    counting only the people it reaches other than the person themselves.
+    """
+    histogram = Counter(BFSTree(degrees.compact_graph(), person_id).distance)
+    histogram.pop(-1, None)
+    histogram.pop(0, None)
+    return dict(histogram)
+
+
+def separation_stats(graph, sources, workers, directory):
+    """
+    Returns the combined distance histogram of full BFS runs from sources,
+    computed by workers processes.
+    """
+    total = Counter()
+    if workers > 1:
+        with process_pool(workers, directory, True) as pool:
+            for histogram in pool.imap_unordered(sample_histogram, sources):
+                total.update(histogram)
+    else:
+        for source in sources:
+            total.update(sample_histogram(source))
+    return total
+
+
+def dataset_stats(directory, samples, workers, seed):
+    """
+    Returns a dictionary of statistics about the dataset in directory.
+    """
+    started = time.perf_counter()
+    random.seed(seed)
+    graph = degrees.compact_graph()
+
+    labels, sizes = components(graph)
+    largest = [person for person in range(len(labels)) if labels[person] == 0]
+    lower, upper = diameter_bounds(graph, largest) if largest else (0, 0)
+
+    # Sample from the largest component, where the average is meaningful
+    sources = [graph.person_ids[person]
+               for person in random.sample(largest, min(samples, len(largest)))]
+    histogram = separation_stats(graph, sources, workers, directory)
+    pairs = sum(histogram.values())
+    average = sum(distance * count for distance, count in histogram.items()) / pairs if pairs else None
+
+    return {
+        "directory": directory,
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "credits": len(graph.person_movies),
+        "components": len(sizes),
+        "largest_component": sizes[0] if sizes else 0,
+        "largest_component_share": sizes[0] / len(labels) if sizes else 0,
+        "component_sizes": {str(size): count for size, count in sorted(Counter(sizes).items())},
+        "diameter": {"lower": lower, "upper": upper},
+        "average_separation": average,
+        "separation_histogram": {str(distance): count for distance, count in sorted(histogram.items())},
+        "samples": len(sources),
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute separation statistics for a dataset.")
+    parser.add_argument("directory", help="dataset directory")
+    parser.add_argument("output", nargs="?", help=f"JSON file to write (default: directory/{DEFAULT_OUTPUT})")
+    parser.add_argument("--samples", type=int, default=100, help="BFS sources for the average separation")
+    parser.add_argument("--workers", type=int, default=0, help="processes for the sampled BFS (0 for one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for sampling")
+    args = parser.parse_args()
+    if args.samples < 0 or args.workers < 0:
+        parser.error("--samples and --workers must not be negative")
+    workers = args.workers or os.cpu_count() or 1
+    output = args.output or os.path.join(args.directory, DEFAULT_OUTPUT)
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=True)
+    print("Data loaded.", file=sys.stderr)
+
+    stats = dataset_stats(args.directory, args.samples, workers, args.seed)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=4)
+        f.write("\n")
+    print(f"{stats['components']} components, largest {stats['largest_component']} people, "
+          f"diameter {stats['diameter']['lower']}-{stats['diameter']['upper']}, "
+          f"average separation {stats['average_separation'] or 0:.2f}", file=sys.stderr)
+    print(f"Saved {output}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
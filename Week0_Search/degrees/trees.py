@@ -0,0 +1,170 @@
+"""
+Whole BFS trees from a single source person, and an LRU cache of them.
+
+A tree stores, for every person in the graph, their distance from the
+source and the (movie, person) step that first reached them. Any shortest
+path to or from the source is then a walk along parent pointers.
+"""
+
+from array import array
+from collections import Counter, OrderedDict
+
+from graph import TYPECODE
+
+# Default memory budget for a TreeCache, in bytes
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+class BFSTree():
+    def __init__(self, graph, source_id):
+        self.graph = graph
+        self.source_id = source_id
+        self.source = graph.person_index[source_id]
+
+        count = len(graph.person_ids)
+        self.distance = array("h", [-1]) * count
+        self.parent_person = array(TYPECODE, [-1]) * count
+        self.parent_movie = array(TYPECODE, [-1]) * count
+        self.search()
+
+    def search(self):
+        """
+        Fills in distances and parents with a BFS over the whole graph.
+        """
+        person_offsets = self.graph.person_offsets
+        person_movies = self.graph.person_movies
+        movie_offsets = self.graph.movie_offsets
+        movie_stars = self.graph.movie_stars
+        distance = self.distance
+        parent_person = self.parent_person
+        parent_movie = self.parent_movie
+
+        distance[self.source] = 0
+        layer = [self.source]
+        depth = 0
+        while layer:
+            depth += 1
+            nextLayer = []
+            for person in layer:
+                for movie in person_movies[person_offsets[person]:person_offsets[person + 1]]:
+                    for neighbor in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                        if distance[neighbor] < 0:
+                            distance[neighbor] = depth
+                            parent_person[neighbor] = person
+                            parent_movie[neighbor] = movie
+                            nextLayer.append(neighbor)
+            layer = nextLayer
+
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the tree's arrays.
+        """
+        return sum(len(a) * a.itemsize
+                   for a in [self.distance, self.parent_person, self.parent_movie])
+
+    def distance_to(self, person_id):
+        """
+        Returns the degrees of separation between the source and a person,
+        or None if they are not connected.
+        """
+        distance = self.distance[self.graph.person_index[person_id]]
+        return None if distance < 0 else distance
+
+    def path_to(self, person_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to a person, or None if there is none.
+        """
+        person = self.graph.person_index[person_id]
+        if self.distance[person] < 0:
+            return None
+        path = []
+        while person != self.source:
+            path.append((self.graph.movie_ids[self.parent_movie[person]],
+                         self.graph.person_ids[person]))
+            person = self.parent_person[person]
+        return path[::-1]
+
+    def path_from(self, person_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect a person to the source, or None if there is none.
+        """
+        person = self.graph.person_index[person_id]
+        if self.distance[person] < 0:
+            return None
+        path = []
+        while person != self.source:
+            parent = self.parent_person[person]
+            path.append((self.graph.movie_ids[self.parent_movie[person]],
+                         self.graph.person_ids[parent]))
+            person = parent
+        return path
+
+    def histogram(self):
+        """
+        Returns a dictionary mapping each degree of separation from the source
+        to the number of people at it. Unreachable people are counted under None.
+        """
+        counts = Counter(self.distance)
+        histogram = {distance: counts[distance] for distance in sorted(counts) if distance >= 0}
+        if -1 in counts:
+            histogram[None] = counts[-1]
+        return histogram
+
+
+class TreeCache():
+    def __init__(self, graph, budget=DEFAULT_BUDGET):
+        self.graph = graph
+        self.used = 0
+        # Maps source person_ids to trees, least recently used first
+        self.trees = OrderedDict()
+        self.budget = budget
+
+    @property
+    def budget(self):
+        """
+        Bytes the cached trees may take up. Lowering it evicts trees
+        until they fit.
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget):
+        self._budget = budget
+        self.evict(0)
+
+    def __contains__(self, person_id):
+        return person_id in self.trees
+
+    def __len__(self):
+        return len(self.trees)
+
+    def get(self, person_id):
+        """
+        Returns the BFS tree from a person, building it if it is not cached.
+        Older trees are evicted while the cache is over its memory budget,
+        but the requested tree is always kept.
+        """
+        if person_id in self.trees:
+            self.trees.move_to_end(person_id)
+            return self.trees[person_id]
+
+        tree = BFSTree(self.graph, person_id)
+        self.trees[person_id] = tree
+        self.used += tree.nbytes()
+        self.evict(1)
+        return tree
+
+    def evict(self, keep):
+        """
+        Evicts the least recently used trees while the cache is over its
+        budget, keeping at least the keep most recently used.
+        """
+        while self.used > self._budget and len(self.trees) > keep:
+            _, evicted = self.trees.popitem(last=False)
+            self.used -= evicted.nbytes()
+
+    def clear(self):
+        self.trees.clear()
+        self.used = 0
@@ -0,0 +1,158 @@
+"""
+Benchmarks for the tic-tac-toe search code.
+
+Usage: python benchmark.py [bitboard|transpositions|alphabeta|parallel]
+"""
+
+import os
+import sys
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+
+# Positions for the alpha-beta benchmark, as (name, moves from the empty board)
+POSITIONS = [
+    ("empty board", []),
+    ("center opening", [(1, 1)]),
+    ("corner opening", [(0, 0)]),
+    ("edge opening", [(0, 1)]),
+    ("corner vs center", [(0, 0), (1, 1)]),
+    ("edge vs corner", [(0, 1), (0, 0)]),
+    ("fork threat", [(0, 0), (1, 1), (2, 2)]),
+    ("X to win", [(0, 0), (1, 0), (0, 1), (1, 1)]),
+]
+
+
+def timed(function, *args):
+    """
+    Returns (result, seconds) for a call to function(*args).
+    """
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def benchmark_bitboard():
+    """
+    Compares minimax on the empty board with nested lists and with bitboards,
+    both starting from an empty transposition table.
+    """
+    ttt.transpositions.clear()
+    bitboard.transpositions.clear()
+    listMove, listTime = timed(ttt.minimax, ttt.initial_state())
+    bitMove, bitTime = timed(bitboard.minimax, bitboard.initial_state())
+    print(f"Lists:     {listTime:.3f}s, move {listMove}")
+    print(f"Bitboards: {bitTime:.3f}s, move {bitMove}")
+    print(f"Speedup:   {listTime / bitTime:.1f}x")
+
+
+def benchmark_transpositions():
+    """
+    Times minimax on the empty board with a cold and a warm transposition
+    table, then the reply to a first move.
+    """
+    ttt.transpositions.clear()
+    board = ttt.initial_state()
+    move, cold = timed(ttt.minimax, board)
+    print(f"Empty board, cold table: {cold:.3f}s, move {move}, "
+          f"{len(ttt.transpositions)} positions stored")
+    move, warm = timed(ttt.minimax, board)
+    print(f"Empty board, warm table: {warm * 1000:.3f}ms, move {move}")
+    board = ttt.result(board, move)
+    reply, seconds = timed(ttt.minimax, board)
+    print(f"Reply to {move}:         {seconds * 1000:.3f}ms, move {reply}")
+
+
+def play(moves):
+    """
+    Returns the board after playing moves from the empty board.
+    """
+    board = ttt.initial_state()
+    for move in moves:
+        board = ttt.result(board, move)
+    return board
+
+
+def search(board, alphaBeta):
+    """
+    Returns (move, nodes, seconds) for minimax on a board, starting from
+    empty tables.
+    """
+    ttt.transpositions.clear()
+    ttt.killers.clear()
+    ttt.history.clear()
+    ttt.counters["nodes"] = 0
+    move, seconds = timed(ttt.minimax, board, alphaBeta)
+    return move, ttt.counters["nodes"], seconds
+
+
+def benchmark_alphabeta():
+    """
+    Compares node counts and timings of exhaustive and alpha-beta minimax
+    on every position in POSITIONS.
+    """
+    print(f"{'position':<18} {'minimax nodes':>13} {'time':>9} {'alpha-beta nodes':>16} {'time':>9}")
+    totals = [0, 0, 0.0, 0.0]
+    for name, moves in POSITIONS:
+        board = play(moves)
+        move, nodes, seconds = search(board, False)
+        abMove, abNodes, abSeconds = search(board, True)
+        # Tied moves may differ, but both must lead to the same value
+        ttt.transpositions.clear()
+        value = ttt.getMinValue if ttt.player(board) == ttt.X else ttt.getMaxValue
+        if value(ttt.result(board, move)) != value(ttt.result(board, abMove)):
+            raise AssertionError(f"{name}: alpha-beta chose {abMove}, minimax {move}")
+        print(f"{name:<18} {nodes:>13} {seconds * 1000:>7.2f}ms {abNodes:>16} {abSeconds * 1000:>7.2f}ms")
+        totals[0] += nodes
+        totals[1] += abNodes
+        totals[2] += seconds
+        totals[3] += abSeconds
+    print(f"{'total':<18} {totals[0]:>13} {totals[2] * 1000:>7.2f}ms {totals[1]:>16} {totals[3] * 1000:>7.2f}ms")
+
+
+def benchmark_parallel(rows=5, cols=5, k=4, depth=7):
+    """
+    Times a fixed-depth m,n,k search of the empty board in this process and
+    with the root moves split across a pool of worker processes. With fewer
+    cores than processes the measured time says little, so the time with a
+    core per process is also estimated, from the nodes searched here plus
+    those of the busiest worker at this process's node rate.
+    """
+    workers = max(os.cpu_count() or 1, 2)
+    game = mnk.Game(rows, cols, k)
+    (move, score, _), seconds = timed(game.search, game.initial_state(), None, depth)
+    serialNodes = game.nodes
+    print(f"{rows}x{cols}, {k} in a row, depth {depth}")
+    print(f"1 process:    {seconds:.3f}s, move {move}, score {score}, {serialNodes} nodes")
+
+    with mnk.process_pool(workers) as pool:
+        game = mnk.Game(rows, cols, k)
+        (move, score, _), parallelSeconds = timed(game.search, game.initial_state(), None, depth, pool)
+    localNodes = game.nodes - sum(game.workerNodes)
+    print(f"{workers} processes: {parallelSeconds:.3f}s, move {move}, score {score}, {game.nodes} nodes "
+          f"({localNodes} here, {' + '.join(str(nodes) for nodes in game.workerNodes)} in workers)")
+    print(f"Speedup:      {seconds / parallelSeconds:.2f}x measured on {os.cpu_count()} cores")
+    estimate = seconds * (localNodes + max(game.workerNodes)) / serialNodes
+    print(f"              {seconds / estimate:.2f}x estimated with a core per process")
+
+
+def main():
+    benchmarks = {
+        "bitboard": benchmark_bitboard,
+        "transpositions": benchmark_transpositions,
+        "alphabeta": benchmark_alphabeta,
+        "parallel": benchmark_parallel,
+    }
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] not in benchmarks):
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(benchmarks)}]")
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        print(f"== {name}")
+        benchmarks[name]()
+
+
+if __name__ == "__main__":
+    main()
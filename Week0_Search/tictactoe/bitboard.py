@@ -0,0 +1,227 @@
+"""
+Tic Tac Toe Player, bitboard backend
+
+Same public functions as tictactoe.py, but a board is a pair of 9-bit ints
+(x, o), one per player, where cell (i, j) is bit 3 * i + j. Wins are checked
+against precomputed masks and the player to move comes from the piece counts.
+"""
+
+import math
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Every cell set
+FULL = 0b111111111
+
+# The eight lines of three: rows, columns and both diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# Number of set bits in every 9-bit board
+POPCOUNT = tuple(bin(bits).count("1") for bits in range(FULL + 1))
+
+# Whether every 9-bit board contains a complete line
+WINS = tuple(any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1))
+
+# (bit, action) for every cell, in row-major order
+CELLS = tuple((1 << (3 * i + j), (i, j)) for i in range(3) for j in range(3))
+
+# The 8 rotations and reflections of the board, as in tictactoe.py: for every
+# cell of the transformed board, the (i, j) it comes from.
+SYMMETRIES = (
+    [(i, j) for i in range(3) for j in range(3)],
+    [(2 - j, i) for i in range(3) for j in range(3)],
+    [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+    [(j, 2 - i) for i in range(3) for j in range(3)],
+    [(i, 2 - j) for i in range(3) for j in range(3)],
+    [(2 - i, j) for i in range(3) for j in range(3)],
+    [(j, i) for i in range(3) for j in range(3)],
+    [(2 - j, 2 - i) for i in range(3) for j in range(3)]
+)
+
+# For every symmetry, the transformed version of every 9-bit board
+SYMMETRY_TABLES = tuple(
+    tuple(sum(1 << k for k, (i, j) in enumerate(symmetry) if bits >> (3 * i + j) & 1)
+          for bits in range(FULL + 1))
+    for symmetry in SYMMETRIES
+)
+
+# Maps canonical board keys to minimax values, kept between calls
+transpositions = {}
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a nested-list board from tictactoe.py.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the nested-list board of a bitboard.
+    """
+    x, o = state
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    if terminal(board):
+        return set()
+    taken = board[0] | board[1]
+    return {action for bit, action in CELLS if not taken & bit}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise Exception("invalid action")
+    bit = 1 << (3 * i + j)
+    x, o = board
+    if (x | o) & bit or terminal(board):
+        raise Exception("invalid action")
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[board[0]]:
+        return X
+    if WINS[board[1]]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = board
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[board[0]]:
+        return 1
+    if WINS[board[1]]:
+        return -1
+    return 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(board):
+        return None
+
+    x, o = board
+    taken = x | o
+    optimalAction = None
+    if POPCOUNT[x] == POPCOUNT[o]:
+        maxValue = -math.inf
+        for bit, action in CELLS:
+            if not taken & bit:
+                value = getMinValue(x | bit, o)
+                if value > maxValue:
+                    maxValue = value
+                    optimalAction = action
+    else:
+        minValue = math.inf
+        for bit, action in CELLS:
+            if not taken & bit:
+                value = getMaxValue(x, o | bit)
+                if value < minValue:
+                    minValue = value
+                    optimalAction = action
+    return optimalAction
+
+
+def canonical_key(x, o):
+    """
+    Returns an int that is the same for a board and all of its
+    rotations and reflections.
+    """
+    return min(table[x] << 9 | table[o] for table in SYMMETRY_TABLES)
+
+
+def getMaxValue(x, o):
+    # O just moved, so only O can have completed a line
+    if WINS[o]:
+        return -1
+    taken = x | o
+    if taken == FULL:
+        return 0
+    key = canonical_key(x, o)
+    if key in transpositions:
+        return transpositions[key]
+    value = -2
+    for bit, _ in CELLS:
+        if not taken & bit:
+            childValue = getMinValue(x | bit, o)
+            if childValue > value:
+                value = childValue
+    transpositions[key] = value
+    return value
+
+
+def getMinValue(x, o):
+    # X just moved, so only X can have completed a line
+    if WINS[x]:
+        return 1
+    taken = x | o
+    if taken == FULL:
+        return 0
+    key = canonical_key(x, o)
+    if key in transpositions:
+        return transpositions[key]
+    value = 2
+    for bit, _ in CELLS:
+        if not taken & bit:
+            childValue = getMaxValue(x, o | bit)
+            if childValue < value:
+                value = childValue
+    transpositions[key] = value
+    return value
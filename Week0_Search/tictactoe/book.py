@@ -0,0 +1,122 @@
+"""
+Builds and checks the tic-tac-toe opening book.
+
+The book holds the best move and the minimax value of every position that
+can come up in a game, one byte per board, so that with the book loaded
+minimax is a single lookup. See tictactoe.load_book for the file format.
+
+Usage: python book.py build|verify [file]
+"""
+
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def reachable_positions():
+    """
+    Returns every board that can come up in a game, keyed by position index.
+    """
+    positions = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        index = ttt.position_index(board)
+        if index in positions:
+            continue
+        positions[index] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return positions
+
+
+def value(board):
+    """
+    Returns the minimax value of a board by searching it.
+    """
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    if ttt.player(board) == ttt.X:
+        return ttt.getMaxValue(board)
+    return ttt.getMinValue(board)
+
+
+def build(path):
+    """
+    Solves every reachable position and writes the book to path.
+    Returns the number of positions.
+    """
+    ttt.book = None
+    data = bytearray([ttt.NO_ENTRY]) * ttt.BOOK_SIZE
+    positions = reachable_positions()
+    for index, board in positions.items():
+        move = 9
+        if not ttt.terminal(board):
+            i, j = ttt.minimax(board)
+            move = 3 * i + j
+        data[index] = 3 * move + value(board) + 1
+    with open(path, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        f.write(data)
+    return len(positions)
+
+
+def verify(path):
+    """
+    Checks the book at path against a fresh search of every reachable
+    position. Returns a list of problems, empty if the book is correct.
+    """
+    if not ttt.load_book(path):
+        return [f"{path} does not exist"]
+    book = ttt.book
+    ttt.book = None
+    ttt.transpositions.clear()
+
+    problems = []
+    positions = reachable_positions()
+    for index, board in positions.items():
+        entry = book[index]
+        if entry == ttt.NO_ENTRY:
+            problems.append(f"{board}: missing")
+            continue
+        move, bookValue = divmod(entry, 3)
+        bookValue -= 1
+        if bookValue != value(board):
+            problems.append(f"{board}: value {bookValue}, search says {value(board)}")
+        if ttt.terminal(board):
+            if move != 9:
+                problems.append(f"{board}: move on a finished board")
+        elif move > 8 or (move // 3, move % 3) not in ttt.actions(board):
+            problems.append(f"{board}: invalid move {move}")
+        elif value(ttt.result(board, divmod(move, 3))) != bookValue:
+            problems.append(f"{board}: move {divmod(move, 3)} is not optimal")
+
+    extra = sum(entry != ttt.NO_ENTRY for entry in book) - len(positions)
+    if extra > 0:
+        problems.append(f"{extra} entries for unreachable boards")
+    ttt.book = book
+    return problems
+
+
+def main():
+    if len(sys.argv) not in [2, 3] or sys.argv[1] not in ["build", "verify"]:
+        sys.exit("Usage: python book.py build|verify [file]")
+    path = sys.argv[2] if len(sys.argv) == 3 else ttt.BOOK_FILE
+
+    start = time.perf_counter()
+    if sys.argv[1] == "build":
+        count = build(path)
+        print(f"Solved {count} positions in {time.perf_counter() - start:.2f}s, saved {path}.")
+    else:
+        problems = verify(path)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(f"{len(problems)} problems in {path}.")
+        print(f"{path} matches search ({time.perf_counter() - start:.2f}s).")
+
+
+if __name__ == "__main__":
+    main()
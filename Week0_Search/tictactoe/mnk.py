@@ -0,0 +1,669 @@
+"""
+m,n,k-game player: tic-tac-toe generalized to any number of rows and columns,
+won by k marks in a row, column or diagonal.
+
+Boards are nested lists of X, O and EMPTY as in tictactoe.py. Beyond 3x3 an
+exhaustive search is out of reach, so minimax runs iterative deepening
+alpha-beta: it searches one ply deeper each round, tries the best move of
+the previous round first, scores positions at the depth limit with a
+heuristic, and stops when the time budget for the move runs out, returning
+the best move it has found so far.
+
+Usage: python mnk.py rows cols k [seconds] [workers]
+(plays the computer against itself, printing every move, with the root
+moves searched by workers processes if more than one)
+"""
+
+import math
+import multiprocessing
+import multiprocessing.connection
+import random
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win. Heuristic scores stay far below it, and a win found
+# sooner scores higher than one found later.
+WIN = 1000000
+
+# Kinds of transposition table entries
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Nodes searched between two looks at the clock
+CLOCK_INTERVAL = 1024
+
+# Default seconds per move
+DEFAULT_BUDGET = 1.0
+
+# Plies below a root move whose transposition table entries a worker
+# process sends back to be merged
+MERGE_PLIES = 3
+
+# The transposition table is cleared before a search once it holds this many positions
+MAX_TRANSPOSITIONS = 2000000
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+    def __init__(self, rows=3, cols=3, k=3, seed=0):
+        if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+            raise ValueError(f"no {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+
+        # Every window of k cells along a row, column or diagonal
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    endI = i + di * (k - 1)
+                    endJ = j + dj * (k - 1)
+                    if 0 <= endI < rows and 0 <= endJ < cols:
+                        self.lines.append(tuple((i + di * step, j + dj * step) for step in range(k)))
+
+        # Cells ordered from the center outwards, where moves tend to be best
+        centerI = (rows - 1) / 2
+        centerJ = (cols - 1) / 2
+        self.order = sorted(((i, j) for i in range(rows) for j in range(cols)),
+                            key=lambda cell: (abs(cell[0] - centerI) + abs(cell[1] - centerJ), cell))
+
+        # Heuristic value of a line holding count marks of one player and
+        # none of the other: each extra mark is worth ten times more
+        self.weights = [0] + [10 ** (count - 1) for count in range(1, k)] + [WIN]
+
+        # Random keys for Zobrist hashing, one per cell and player, so a
+        # move updates the board's hash with a single xor. Games with the
+        # same seed share keys, so their tables can be merged.
+        self.seed = seed
+        rng = random.Random(seed)
+        self.keys = [[{X: rng.getrandbits(64), O: rng.getrandbits(64)} for j in range(cols)]
+                     for i in range(rows)]
+
+        # Maps a board hash to (depth, score, kind, move), kept between moves
+        self.transpositions = {}
+        # When a dictionary, also gets every entry stored, so that the entries
+        # of one search can be passed on to other processes
+        self.written = None
+
+        self.nodes = 0
+        # Nodes searched by each worker process of a pool in the last search
+        self.workerNodes = []
+        self.deadline = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        xs = sum(row.count(X) for row in board)
+        os = sum(row.count(O) for row in board)
+        return X if xs == os else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        if self.terminal(board):
+            return set()
+        return {(i, j) for i in range(self.rows) for j in range(self.cols) if board[i][j] is EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if action not in self.actions(board):
+            raise Exception("invalid action")
+        i, j = action
+        newBoard = [list(row) for row in board]
+        newBoard[i][j] = self.player(board)
+        return newBoard
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for line in self.lines:
+            i, j = line[0]
+            first = board[i][j]
+            if first is not EMPTY and all(board[i][j] == first for i, j in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or all(cell is not EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        won = self.winner(board)
+        return 1 if won == X else -1 if won == O else 0
+
+    def minimax(self, board, budget=DEFAULT_BUDGET):
+        """
+        Returns the best action found for the current player on the board
+        within budget seconds, or with no time limit if budget is None.
+        """
+        if self.terminal(board):
+            return None
+        return self.search(board, budget)[0]
+
+    def search(self, board, budget=DEFAULT_BUDGET, maxDepth=None, pool=None):
+        """
+        Searches a non-terminal board with iterative deepening for up to
+        budget seconds, and no deeper than maxDepth if given. Returns
+        (action, score, depth), where score is from X's point of view and
+        depth is that of the deepest finished round. If pool is given (see
+        SearchPool), the moves at the root are searched in parallel.
+        """
+        self.deadline = None if budget is None else time.perf_counter() + budget
+        self.nodes = 0
+        self.workerNodes = [0] * (0 if pool is None else len(pool))
+        if len(self.transpositions) > MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+
+        # The search makes and takes back moves on a private copy of the board
+        board = [list(row) for row in board]
+        lastDepth = sum(row.count(EMPTY) for row in board)
+        if maxDepth is not None:
+            lastDepth = min(lastDepth, maxDepth)
+
+        bestMove = self.orderedActions(board, None)[0]
+        bestScore = None
+        completed = 0
+        for depth in range(1, lastDepth + 1):
+            # Try the best move so far first, so that a round cut short still
+            # improves on it if any other move beat it
+            moves = self.orderedActions(board, bestMove)
+            if pool is None:
+                roundMove, roundScore, finished = self.searchRound(board, depth, moves)
+            else:
+                roundMove, roundScore, finished = self.parallelRound(board, depth, moves, pool)
+            if roundMove is not None:
+                bestMove = roundMove
+            if not finished:
+                break
+            bestScore = roundScore
+            completed = depth
+            # A forced win or loss cannot change with more depth
+            if abs(bestScore) > WIN - self.size:
+                break
+        return bestMove, bestScore, completed
+
+    def searchRound(self, board, depth, moves):
+        """
+        Searches moves from the root of a board to depth. Returns
+        (move, score, finished) for the best of them, where finished is
+        False if time ran out before every move was searched.
+        """
+        maximizing = self.player(board) == X
+        roundMove = None
+        roundScore = -math.inf if maximizing else math.inf
+        try:
+            for move in moves:
+                score = self.searchMove(board, move, depth, roundScore)
+                if (score > roundScore) if maximizing else (score < roundScore):
+                    roundScore = score
+                    roundMove = move
+        except SearchTimeout:
+            return roundMove, roundScore, False
+        return roundMove, roundScore, True
+
+    def parallelRound(self, board, depth, moves, pool):
+        """
+        Like searchRound, but after searching the first move here, hands
+        the other moves to the worker processes of pool one at a time, each
+        with the best score so far as the bound to beat. Transposition table
+        entries near the root found here or by any worker are merged into
+        this game's table and passed on to the other workers. Moves with
+        equal scores may be picked in a different order than searchRound's.
+        """
+        self.written = {}
+        try:
+            roundMove, roundScore, finished = self.searchRound(board, depth, moves[:1])
+        finally:
+            written, self.written = self.written, None
+        if not finished:
+            return roundMove, roundScore, False
+
+        maximizing = self.player(board) == X
+        # The clock of another process may differ, so send a wall-clock deadline
+        deadline = None if self.deadline is None else time.time() + self.deadline - time.perf_counter()
+        shape = (self.rows, self.cols, self.k, self.seed)
+        pool.share(shape, near_root(written, depth))
+
+        remaining = iter(moves[1:])
+        busy = 0
+        for worker in range(len(pool)):
+            move = next(remaining, None)
+            if move is None:
+                break
+            pool.send(worker, (shape, board, move, depth, roundScore, deadline))
+            busy += 1
+        while busy:
+            worker, (move, score, entries, nodes) = pool.receive()
+            busy -= 1
+            self.nodes += nodes
+            self.workerNodes[worker] += nodes
+            self.merge(entries)
+            pool.share(shape, entries, worker)
+            if score is None:
+                finished = False
+            elif (score > roundScore) if maximizing else (score < roundScore):
+                # Only a score beating the bound the move was given is exact,
+                # and that bound was never better than roundScore
+                roundScore = score
+                roundMove = move
+            if finished:
+                move = next(remaining, None)
+                if move is not None:
+                    pool.send(worker, (shape, board, move, depth, roundScore, deadline))
+                    busy += 1
+        return roundMove, roundScore, finished
+
+    def searchMove(self, board, move, depth, bound):
+        """
+        Returns the score of playing move on a board, searched to depth, or
+        some score no better than bound for the player to move if the move
+        cannot beat it. The board is left as it was.
+        """
+        i, j = move
+        empty = sum(row.count(EMPTY) for row in board)
+        maximizing = self.player(board) == X
+        mark = X if maximizing else O
+        childHash = self.hash(board) ^ self.keys[i][j][mark]
+        board[i][j] = mark
+        try:
+            if maximizing:
+                return self.getMinValue(board, childHash, depth - 1, bound, math.inf, 1, empty - 1, move)
+            return self.getMaxValue(board, childHash, depth - 1, -math.inf, bound, 1, empty - 1, move)
+        finally:
+            board[i][j] = EMPTY
+
+    def merge(self, entries):
+        """
+        Adds transposition table entries from another process, keeping
+        whichever entry for a board was searched deeper.
+        """
+        table = self.transpositions
+        for boardHash, entry in entries.items():
+            current = table.get(boardHash)
+            if current is None or entry[0] > current[0]:
+                table[boardHash] = entry
+
+    def hash(self, board):
+        """
+        Returns the Zobrist hash of a board.
+        """
+        boardHash = 0
+        for i in range(self.rows):
+            for j in range(self.cols):
+                if board[i][j] is not EMPTY:
+                    boardHash ^= self.keys[i][j][board[i][j]]
+        return boardHash
+
+    def orderedActions(self, board, first):
+        """
+        Returns the empty cells of a board from the center outwards,
+        with first, if given, moved to the front.
+        """
+        moves = [cell for cell in self.order if board[cell[0]][cell[1]] is EMPTY]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def completes(self, board, move):
+        """
+        Returns True if the mark at move is part of k in a row.
+        """
+        i, j = move
+        mark = board[i][j]
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            count = 1
+            for sign in [1, -1]:
+                row = i + sign * di
+                col = j + sign * dj
+                while 0 <= row < self.rows and 0 <= col < self.cols and board[row][col] == mark:
+                    count += 1
+                    row += sign * di
+                    col += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic score of a board from X's point of view: every
+        line that only one player has marks in counts for that player,
+        more so the more marks it holds.
+        """
+        score = 0
+        weights = self.weights
+        for line in self.lines:
+            xs = 0
+            os = 0
+            for i, j in line:
+                cell = board[i][j]
+                if cell is X:
+                    xs += 1
+                elif cell is O:
+                    os += 1
+            if not os:
+                score += weights[xs]
+            elif not xs:
+                score -= weights[os]
+        return score
+
+    def tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CLOCK_INTERVAL == 0:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout
+
+    def probe(self, boardHash, depth, alpha, beta):
+        """
+        Returns (score, alpha, beta, move) from the transposition table,
+        where score is None unless the stored entry settles the position.
+        """
+        entry = self.transpositions.get(boardHash)
+        if entry is None:
+            return None, alpha, beta, None
+        entryDepth, score, kind, move = entry
+        if entryDepth >= depth:
+            if kind == EXACT:
+                return score, alpha, beta, move
+            if kind == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score, alpha, beta, move
+        return None, alpha, beta, move
+
+    def store(self, boardHash, depth, score, alpha, beta, move):
+        kind = LOWER if score >= beta else UPPER if score <= alpha else EXACT
+        entry = (depth, score, kind, move)
+        self.transpositions[boardHash] = entry
+        if self.written is not None:
+            self.written[boardHash] = entry
+
+    def getMaxValue(self, board, boardHash, depth, alpha, beta, ply, empty, lastMove):
+        self.tick()
+        # O just moved, so only O can have won
+        if self.completes(board, lastMove):
+            return -(WIN - ply)
+        if empty == 0:
+            return 0
+        if depth == 0:
+            return self.evaluate(board)
+
+        score, alpha, beta, hashMove = self.probe(boardHash, depth, alpha, beta)
+        if score is not None:
+            return score
+
+        windowAlpha = alpha
+        value = -math.inf
+        bestMove = None
+        for i, j in self.orderedActions(board, hashMove):
+            board[i][j] = X
+            childValue = self.getMinValue(board, boardHash ^ self.keys[i][j][X], depth - 1,
+                                          alpha, beta, ply + 1, empty - 1, (i, j))
+            board[i][j] = EMPTY
+            if childValue > value:
+                value = childValue
+                bestMove = (i, j)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        self.store(boardHash, depth, value, windowAlpha, beta, bestMove)
+        return value
+
+    def getMinValue(self, board, boardHash, depth, alpha, beta, ply, empty, lastMove):
+        self.tick()
+        # X just moved, so only X can have won
+        if self.completes(board, lastMove):
+            return WIN - ply
+        if empty == 0:
+            return 0
+        if depth == 0:
+            return self.evaluate(board)
+
+        score, alpha, beta, hashMove = self.probe(boardHash, depth, alpha, beta)
+        if score is not None:
+            return score
+
+        windowBeta = beta
+        value = math.inf
+        bestMove = None
+        for i, j in self.orderedActions(board, hashMove):
+            board[i][j] = O
+            childValue = self.getMaxValue(board, boardHash ^ self.keys[i][j][O], depth - 1,
+                                          alpha, beta, ply + 1, empty - 1, (i, j))
+            board[i][j] = EMPTY
+            if childValue < value:
+                value = childValue
+                bestMove = (i, j)
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        self.store(boardHash, depth, value, alpha, windowBeta, bestMove)
+        return value
+
+    def show(self, board):
+        """
+        Returns a board as text, one line per row.
+        """
+        return "\n".join(" ".join(cell or "." for cell in row) for row in board)
+
+
+def near_root(entries, depth):
+    """
+    Returns the transposition table entries of a search to depth that lie
+    at most MERGE_PLIES below a root move.
+    """
+    return {boardHash: entry for boardHash, entry in entries.items()
+            if entry[0] >= depth - MERGE_PLIES}
+
+
+class SearchPool():
+    """
+    Worker processes for Game.search. Each worker keeps a Game, with its
+    transposition table, for every board shape it is sent, for as long as
+    the pool lives. It talks to this process over its own pipe, so root
+    moves can be handed out one at a time as workers free up, and table
+    entries found by one worker can be passed on to the others before
+    their next move.
+    """
+
+    def __init__(self, workers):
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for _ in range(workers):
+            connection, child = context.Pipe()
+            process = context.Process(target=serve_subtrees, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        # (shape, entries, worker) batches to pass on, where worker is the one
+        # that found them, if any, and how many batches each worker has been sent
+        self.shared = []
+        self.sent = [0] * workers
+
+    def __len__(self):
+        return len(self.processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+    def share(self, shape, entries, source=None):
+        """
+        Queues transposition table entries for every worker but source.
+        """
+        if entries:
+            self.shared.append((shape, entries, source))
+
+    def send(self, worker, task):
+        """
+        Sends a worker the entries shared since it was last sent any, then
+        a task for search_subtree.
+        """
+        connection = self.connections[worker]
+        for shape, entries, source in self.shared[self.sent[worker]:]:
+            if source != worker:
+                connection.send(("merge", shape, entries))
+        self.sent[worker] = len(self.shared)
+        connection.send(("search", task))
+
+        # Forget the batches every worker has been sent
+        done = min(self.sent)
+        if done:
+            del self.shared[:done]
+            self.sent = [sent - done for sent in self.sent]
+
+    def receive(self):
+        """
+        Waits for a worker to finish a task. Returns (worker, result).
+        """
+        connection = multiprocessing.connection.wait(self.connections)[0]
+        worker = self.connections.index(connection)
+        try:
+            kind, value = connection.recv()
+        except EOFError:
+            raise RuntimeError("a search worker stopped without a result")
+        if kind == "error":
+            raise RuntimeError(f"subtree search failed: {value}")
+        return worker, value
+
+    def terminate(self):
+        """
+        Stops every worker, even in the middle of a task.
+        """
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        for connection in self.connections:
+            connection.close()
+        self.processes = []
+        self.connections = []
+
+
+def process_pool(workers):
+    """
+    Returns a SearchPool of that many worker processes for Game.search.
+    """
+    return SearchPool(workers)
+
+
+# Games of a worker process by (rows, cols, k, seed), each keeping its own
+# transposition table between tasks
+workerGames = {}
+
+
+def worker_game(shape):
+    """
+    Returns this worker process's Game for a (rows, cols, k, seed) shape.
+    """
+    if shape not in workerGames:
+        workerGames[shape] = Game(*shape)
+    return workerGames[shape]
+
+
+def serve_subtrees(connection):
+    """
+    Runs in a worker process of a SearchPool: merges the entries and
+    searches the tasks sent down connection until it closes.
+    """
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        try:
+            if message[0] == "merge":
+                _, shape, entries = message
+                worker_game(shape).merge(entries)
+            else:
+                connection.send(("result", search_subtree(message[1])))
+        except Exception as error:
+            connection.send(("error", repr(error)))
+
+
+def search_subtree(task):
+    """
+    Searches one root move in a worker process. Returns (move, score,
+    entries, nodes), where score is None if time ran out and entries are
+    the transposition table entries this task stored at most MERGE_PLIES
+    below the root move.
+    """
+    shape, board, move, depth, bound, deadline = task
+    game = worker_game(shape)
+    game.deadline = None if deadline is None else time.perf_counter() + deadline - time.time()
+    game.nodes = 0
+    if len(game.transpositions) > MAX_TRANSPOSITIONS:
+        game.transpositions.clear()
+    game.written = {}
+    try:
+        score = game.searchMove(board, move, depth, bound)
+    except SearchTimeout:
+        score = None
+    finally:
+        written, game.written = game.written, None
+    return move, score, near_root(written, depth), game.nodes
+
+
+def main():
+    if len(sys.argv) not in [4, 5, 6]:
+        sys.exit("Usage: python mnk.py rows cols k [seconds] [workers]")
+    rows, cols, k = (int(arg) for arg in sys.argv[1:4])
+    budget = float(sys.argv[4]) if len(sys.argv) >= 5 else DEFAULT_BUDGET
+    workers = int(sys.argv[5]) if len(sys.argv) == 6 else 1
+    game = Game(rows, cols, k)
+
+    board = game.initial_state()
+    pool = process_pool(workers) if workers > 1 else None
+    try:
+        while not game.terminal(board):
+            start = time.perf_counter()
+            move, score, depth = game.search(board, budget, pool=pool)
+            seconds = time.perf_counter() - start
+            print(f"{game.player(board)} plays {move}: depth {depth}, score {score}, "
+                  f"{game.nodes} nodes in {seconds:.2f}s")
+            board = game.result(board, move)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    print(game.show(board))
+    won = game.winner(board)
+    print(f"{won} wins." if won else "Tie.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,50 @@ X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 rotations and reflections of the board. Each one lists, for every
+# cell of the transformed board in row-major order, the (i, j) it comes from.
+SYMMETRIES = [
+    [(i, j) for i in range(3) for j in range(3)],
+    [(2 - j, i) for i in range(3) for j in range(3)],
+    [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+    [(j, 2 - i) for i in range(3) for j in range(3)],
+    [(i, 2 - j) for i in range(3) for j in range(3)],
+    [(2 - i, j) for i in range(3) for j in range(3)],
+    [(j, i) for i in range(3) for j in range(3)],
+    [(2 - j, 2 - i) for i in range(3) for j in range(3)]
+]
+
+# Characters used to spell out a board as a key
+CELL_KEYS = {X: "X", O: "O", EMPTY: "-"}
+
+# Maps canonical board keys to minimax values. It is kept between calls,
+# so positions solved for one move are not searched again for the next.
+transpositions = {}
+
+# Static move order for alpha-beta: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Alpha-beta move ordering heuristics: the last move to cause a cutoff at
+# each depth, and a score per move that grows with every cutoff it causes
+killers = {}
+history = {}
+
+# Number of positions visited by the search, for benchmarks
+counters = {"nodes": 0}
+
+# Opening book written by book.py: a header, then one byte per board in
+# position_index() order holding 3 * move + value + 1, where move is
+# 3 * i + j (9 on a finished board) and value is the minimax value
+BOOK_FILE = "tictactoe.book"
+BOOK_MAGIC = b"TTTBOOK1"
+BOOK_SIZE = 3 ** 9
+
+# Book byte for boards that cannot come up in a game
+NO_ENTRY = 255
+
+# The loaded opening book, if any
+book = None
+
 
 def initial_state():
     """
@@ -194,9 +238,10 @@ def utility(board):
         return -1
 
 
-def minimax(board):
+def minimax(board, alphaBeta=False):
     """
     Returns the optimal action for the current player on the board.
+    With alphaBeta, branches that cannot change the result are pruned.
     """
     # HOW IT WORKS:
     # Determine whose turn it is. If it's X's turn, get the maximum score possible given 
@@ -205,48 +250,240 @@ def minimax(board):
     # at which point you can decide what the optimal move would be.
 
     if terminal(board):
-        return NONE
+        return None
+    if book is not None:
+        entry = book[position_index(board)]
+        if entry != NO_ENTRY:
+            return divmod(entry // 3, 3)
+    if alphaBeta:
+        return alphaBetaAction(board)
 
     optimalAction = "This is the action that will give us the optimalValue"
     playerTurn = player(board)
+    # The search makes and takes back moves on one private copy of the board
+    # rather than building a new board per move with result()
+    board = scratchBoard(board)
 
     if playerTurn == X:
         maxValue = -math.inf
-        for action in actions(board):
-            optimalValue = getMinValue(result(board, action))
+        for i, j in actions(board):
+            board[i][j] = X
+            optimalValue = getMinValue(board)
+            board[i][j] = EMPTY
             if optimalValue > maxValue:
                 maxValue = optimalValue
-                optimalAction = action
+                optimalAction = (i, j)
     elif playerTurn == O:
         minValue = math.inf
-        for action in actions(board):
-            optimalValue = getMaxValue(result(board, action))
+        for i, j in actions(board):
+            board[i][j] = O
+            optimalValue = getMaxValue(board)
+            board[i][j] = EMPTY
             if optimalValue < minValue:
                 minValue = optimalValue
-                optimalAction = action
-    
+                optimalAction = (i, j)
+
     return optimalAction
 
 
+def position_index(board):
+    """
+    Returns the board read as a base-3 number, with each cell 0 if empty,
+    1 for X and 2 for O.
+    """
+    index = 0
+    for row in board:
+        for cell in row:
+            index = 3 * index + (0 if cell is EMPTY else 1 if cell == X else 2)
+    return index
+
+
+def load_book(path=BOOK_FILE):
+    """
+    Loads the opening book at path, so that minimax looks moves up instead of
+    searching. Returns False if there is no book there.
+    """
+    global book
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return False
+    if data[:len(BOOK_MAGIC)] != BOOK_MAGIC or len(data) != len(BOOK_MAGIC) + BOOK_SIZE:
+        raise ValueError(f"{path} is not a tic-tac-toe opening book")
+    book = data[len(BOOK_MAGIC):]
+    return True
+
+
+def scratchBoard(board):
+    """
+    Returns a copy of a board for the search to modify in place.
+    """
+    return [list(row) for row in board]
+
+
+def canonical_key(board):
+    """
+    Returns a string that is the same for a board and all of its
+    rotations and reflections.
+    """
+    return min("".join(CELL_KEYS[board[i][j]] for i, j in symmetry)
+               for symmetry in SYMMETRIES)
+
+
 def getMaxValue(board):
+    counters["nodes"] += 1
+    # Symmetric positions have the same value, so look up the canonical form
+    key = canonical_key(board)
+    if key in transpositions:
+        return transpositions[key]
+
     if terminal(board):
-        return utility(board)
+        value = utility(board)
     else:
+        # Make each move in place and take it back afterwards, so the board
+        # is left as it was
         value = -math.inf
-        for action in actions(board):
-            resultOfMinValue = getMinValue(result(board, action))
-            if resultOfMinValue > value:
-                value = resultOfMinValue
+        for row in board:
+            for j in range(3):
+                if row[j] is EMPTY:
+                    row[j] = X
+                    resultOfMinValue = getMinValue(board)
+                    row[j] = EMPTY
+                    if resultOfMinValue > value:
+                        value = resultOfMinValue
+
+    transpositions[key] = value
     return value
 
 
 def getMinValue(board):
+    counters["nodes"] += 1
+    key = canonical_key(board)
+    if key in transpositions:
+        return transpositions[key]
+
     if terminal(board):
-        return utility(board)
+        value = utility(board)
     else:
         value = math.inf
-        for action in actions(board):
-            resultOfMaxValue = getMaxValue(result(board, action))
-            if resultOfMaxValue < value:
-                value = resultOfMaxValue
+        for row in board:
+            for j in range(3):
+                if row[j] is EMPTY:
+                    row[j] = O
+                    resultOfMaxValue = getMaxValue(board)
+                    row[j] = EMPTY
+                    if resultOfMaxValue < value:
+                        value = resultOfMaxValue
+
+    transpositions[key] = value
+    return value
+
+
+def orderedActions(board, depth):
+    """
+    Returns the actions on the board in the order alpha-beta should try
+    them: the killer move for this depth, then by history score, then
+    center, corners and edges.
+    """
+    killer = killers.get(depth)
+    # sorted is stable, so ties keep the static order
+    return sorted([action for action in MOVE_ORDER if board[action[0]][action[1]] is EMPTY],
+                  key=lambda action: (action != killer, -history.get(action, 0)))
+
+
+def recordCutoff(action, depth):
+    killers[depth] = action
+    # Cutoffs near the root save the most work
+    history[action] = history.get(action, 0) + (9 - depth) ** 2
+
+
+def alphaBetaAction(board):
+    """
+    Returns the optimal action for the current player on a non-terminal
+    board, using alpha-beta search.
+    """
+    depth = 9 - len(actions(board))
+    optimalAction = None
+    playerTurn = player(board)
+    board = scratchBoard(board)
+
+    if playerTurn == X:
+        maxValue = -math.inf
+        for i, j in orderedActions(board, depth):
+            board[i][j] = X
+            value = getAlphaBetaMin(board, maxValue, math.inf, depth + 1)
+            board[i][j] = EMPTY
+            if value > maxValue:
+                maxValue = value
+                optimalAction = (i, j)
+                if maxValue == 1:
+                    break
+    else:
+        minValue = math.inf
+        for i, j in orderedActions(board, depth):
+            board[i][j] = O
+            value = getAlphaBetaMax(board, -math.inf, minValue, depth + 1)
+            board[i][j] = EMPTY
+            if value < minValue:
+                minValue = value
+                optimalAction = (i, j)
+                if minValue == -1:
+                    break
+
+    return optimalAction
+
+
+def getAlphaBetaMax(board, alpha, beta, depth):
+    counters["nodes"] += 1
+    # Only exact values are stored, so any entry can be returned as is
+    key = canonical_key(board)
+    if key in transpositions:
+        return transpositions[key]
+
+    if terminal(board):
+        transpositions[key] = utility(board)
+        return transpositions[key]
+
+    value = -math.inf
+    for i, j in orderedActions(board, depth):
+        board[i][j] = X
+        childValue = getAlphaBetaMin(board, max(alpha, value), beta, depth + 1)
+        board[i][j] = EMPTY
+        if childValue > value:
+            value = childValue
+        # A win cannot be improved on, and at beta O will avoid this board
+        if value == 1 or value >= beta:
+            recordCutoff((i, j), depth)
+            break
+
+    # At or below alpha the value is only an upper bound, at beta a lower one
+    if value == 1 or alpha < value < beta:
+        transpositions[key] = value
+    return value
+
+
+def getAlphaBetaMin(board, alpha, beta, depth):
+    counters["nodes"] += 1
+    key = canonical_key(board)
+    if key in transpositions:
+        return transpositions[key]
+
+    if terminal(board):
+        transpositions[key] = utility(board)
+        return transpositions[key]
+
+    value = math.inf
+    for i, j in orderedActions(board, depth):
+        board[i][j] = O
+        childValue = getAlphaBetaMax(board, alpha, min(beta, value), depth + 1)
+        board[i][j] = EMPTY
+        if childValue < value:
+            value = childValue
+        if value == -1 or value <= alpha:
+            recordCutoff((i, j), depth)
+            break
+
+    if value == -1 or alpha < value < beta:
+        transpositions[key] = value
     return value
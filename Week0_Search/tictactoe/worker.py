@@ -0,0 +1,154 @@
+"""
+Runs the computer's move search in a background process, so the game
+window keeps redrawing at a steady frame rate while the computer thinks,
+however long the search takes. A process rather than a thread keeps the
+search from holding the interpreter lock.
+
+One process serves every search of a game and the games after it, so the
+tables a search function keeps between calls, such as tictactoe.py's
+transposition table, keep growing from one move to the next instead of
+starting cold each time. Cancelling a search that is still running stops
+that process, and the next search starts a fresh one.
+"""
+
+import multiprocessing
+import time
+
+import tictactoe as ttt
+
+# Seconds the computer appears to think for, even when its move is instant
+MIN_THINKING = 0.5
+
+
+def serve(minimax, connection, initializer, initargs):
+    """
+    Runs in the worker process: answers every (request, board) sent down
+    connection with (request, "move", minimax(board)), or with (request,
+    "error", message) if the search fails, until the connection closes.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            request, board = connection.recv()
+        except EOFError:
+            return
+        try:
+            reply = (request, "move", minimax(board))
+        except Exception as error:
+            reply = (request, "error", repr(error))
+        connection.send(reply)
+
+
+class MoveWorker():
+    def __init__(self, minimax=ttt.minimax, minThinking=MIN_THINKING,
+                 initializer=None, initargs=()):
+        # The platform's own start method: forking a process that has
+        # started a GUI toolkit is not safe everywhere
+        self.context = multiprocessing.get_context()
+        self.minimax = minimax
+        self.minThinking = minThinking
+        # Called with initargs in the worker process before its first search
+        self.initializer = initializer
+        self.initargs = initargs
+        self.process = None
+        self.connection = None
+        # Number of the last search started, and of the one whose move is
+        # wanted, or None
+        self.request = 0
+        self.pending = None
+        self.started = None
+        self.move = None
+
+    @property
+    def thinking(self):
+        """
+        True from start() until the move has been taken with poll() or
+        the search cancelled.
+        """
+        return self.pending is not None
+
+    def elapsed(self):
+        """
+        Returns the seconds since the current search started.
+        """
+        return 0.0 if self.started is None else time.perf_counter() - self.started
+
+    def start(self, board):
+        """
+        Starts searching for the best move on a board, cancelling any
+        search still running. The worker process is started on first use.
+        """
+        self.cancel()
+        if self.process is None:
+            self.connection, child = self.context.Pipe()
+            self.process = self.context.Process(
+                target=serve, args=(self.minimax, child, self.initializer, self.initargs), daemon=True
+            )
+            self.process.start()
+            child.close()
+        self.request += 1
+        self.connection.send((self.request, board))
+        self.pending = self.request
+        self.started = time.perf_counter()
+
+    def poll(self):
+        """
+        Returns the move once the search has finished and at least
+        minThinking seconds have passed, or None while it is still
+        thinking. Never blocks.
+        """
+        if self.pending is None:
+            return None
+        while self.move is None and self.connection.poll():
+            try:
+                request, kind, value = self.connection.recv()
+            except EOFError:
+                self.close()
+                raise RuntimeError("move search stopped without a result")
+            if request != self.pending:
+                # The answer to a cancelled search
+                continue
+            if kind == "error":
+                self.pending = None
+                self.cancel()
+                raise RuntimeError(f"move search failed: {value}")
+            self.move = value
+        if self.move is None or self.elapsed() < self.minThinking:
+            return None
+        move = self.move
+        self.cancel()
+        return move
+
+    def cancel(self):
+        """
+        Stops the current search, if any. A search still running is stopped
+        by stopping the worker process, so the next start() waits for none
+        of it, though the tables the process had built are lost with it.
+        """
+        running = self.pending is not None and self.move is None
+        self.pending = None
+        self.started = None
+        self.move = None
+        if running:
+            self.stop()
+
+    def close(self):
+        """
+        Stops the worker process, even in the middle of a search. A later
+        start() starts a new one.
+        """
+        self.cancel()
+        self.stop()
+
+    def stop(self):
+        """
+        Terminates the worker process, if there is one.
+        """
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join()
+            self.connection.close()
+        self.process = None
+        self.connection = None
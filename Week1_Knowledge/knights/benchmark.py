@@ -0,0 +1,104 @@
+"""
+Benchmarks for the entailment backends in logic.py.
+
+Usage: python benchmark.py [backends|incremental]
+"""
+
+import sys
+import time
+
+from logic import And, Biconditional, Not, Or, Symbol, model_check
+# Imported up front so that model_check does not time the imports
+import compiled  # noqa: F401
+import sat  # noqa: F401
+import vectorized
+from sat import KnowledgeBase
+
+# Largest number of symbols to run each backend that checks every model on
+MAX_SYMBOLS = {"enumerate": 16, "compiled": 20, "vectorized": 30}
+
+
+def timed(function, *args):
+    """
+    Returns (result, seconds) for a call to function(*args).
+    """
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def islanders(count):
+    """
+    Returns (knowledge, query, symbols) for a chain of count islanders, each
+    a knight or a knave. The first says "I am a knight and a knave", every
+    other one says "the one before me is a knave". The query is that the
+    last one is a knight.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(count)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(count)]
+    rules = []
+    for knight, knave in zip(knights, knaves):
+        rules.append(Or(knight, knave))
+        rules.append(Not(And(knight, knave)))
+    rules.append(Biconditional(knights[0], And(knights[0], knaves[0])))
+    for i in range(1, count):
+        rules.append(Biconditional(knights[i], knaves[i - 1]))
+    return And(*rules), knights[-1], knights + knaves
+
+
+def benchmark_backends():
+    """
+    Times model_check with each backend on growing islander puzzles.
+    """
+    print(f"{'symbols':>7} {'enumerate':>10} {'compiled':>10} {'vectorized':>10} {'sat':>10}")
+    for count in [2, 4, 6, 7, 8, 9, 10, 12, 15, 16, 32, 64, 128]:
+        knowledge, query, symbols = islanders(count)
+        answer, satSeconds = timed(model_check, knowledge, query, "sat")
+        columns = []
+        for backend, limit in MAX_SYMBOLS.items():
+            if len(symbols) > limit or (backend == "vectorized" and vectorized.np is None):
+                columns.append(f"{'-':>10}")
+                continue
+            expected, seconds = timed(model_check, knowledge, query, backend)
+            if answer != expected:
+                raise AssertionError(f"{backend} and sat disagree on {count} islanders")
+            columns.append(f"{seconds * 1000:8.2f}ms")
+        print(f"{len(symbols):>7} {' '.join(columns)} {satSeconds * 1000:8.2f}ms")
+
+
+def benchmark_incremental():
+    """
+    Times asking about every symbol of growing islander puzzles, with a
+    fresh model_check per symbol and with one KnowledgeBase.
+    """
+    print(f"{'symbols':>7} {'model_check':>12} {'KnowledgeBase':>14} {'solves':>7}")
+    for count in [4, 16, 64, 256]:
+        knowledge, _, symbols = islanders(count)
+        expected, seconds = timed(lambda: [model_check(knowledge, symbol, "sat") for symbol in symbols])
+
+        def ask_all():
+            base = KnowledgeBase(knowledge)
+            return [base.ask(symbol) for symbol in symbols], base
+
+        (answers, base), baseSeconds = timed(ask_all)
+        if answers != expected:
+            raise AssertionError(f"KnowledgeBase and model_check disagree on {count} islanders")
+        print(f"{len(symbols):>7} {seconds * 1000:>10.2f}ms {baseSeconds * 1000:>12.2f}ms "
+              f"{base.solves:>7}")
+
+
+def main():
+    benchmarks = {
+        "backends": benchmark_backends,
+        "incremental": benchmark_incremental,
+    }
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] not in benchmarks):
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(benchmarks)}]")
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        print(f"== {name}")
+        benchmarks[name]()
+
+
+if __name__ == "__main__":
+    main()
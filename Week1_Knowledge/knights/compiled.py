@@ -0,0 +1,147 @@
+"""
+Compiled sentence evaluation for logic.py.
+
+Sentence.evaluate walks the sentence tree and looks every symbol up in a
+model dictionary, once per model. Here a sentence is compiled once into a
+single Python function of a model packed into an int, bit i holding the
+value of symbol i: the sentence is written out as one Python expression
+over bit tests, so evaluating a model runs one function's bytecode rather
+than a method call per connective. Truth-table checking then counts through
+the ints from 0 to 2^n - 1.
+
+Python's parser limits how deeply parentheses nest, so sentences nested
+too deeply for one expression are compiled into a list of steps instead,
+one per distinct subsentence, run in order from the symbols up. That is
+slower, but involves no recursion, so it has no depth limit.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+def symbol_indices(*sentences):
+    """
+    Returns a dictionary mapping every symbol name in sentences to its bit,
+    in name order.
+    """
+    names = sorted(set().union(*(sentence.symbols() for sentence in sentences)))
+    return {name: i for i, name in enumerate(names)}
+
+
+def source(sentence, indices):
+    """
+    Returns a Python expression for sentence over the model int m.
+    """
+    if isinstance(sentence, Symbol):
+        return f"(m >> {indices[sentence.name]} & 1)"
+    if isinstance(sentence, Not):
+        return f"not {source(sentence.operand, indices)}"
+    if isinstance(sentence, And):
+        if not sentence.conjuncts:
+            return "True"
+        return "(" + " and ".join(source(conjunct, indices) for conjunct in sentence.conjuncts) + ")"
+    if isinstance(sentence, Or):
+        if not sentence.disjuncts:
+            return "False"
+        return "(" + " or ".join(source(disjunct, indices) for disjunct in sentence.disjuncts) + ")"
+    if isinstance(sentence, Implication):
+        antecedent = source(sentence.antecedent, indices)
+        consequent = source(sentence.consequent, indices)
+        return f"(not {antecedent} or {consequent})"
+    if isinstance(sentence, Biconditional):
+        # Each side once, compared as booleans
+        left = source(sentence.left, indices)
+        right = source(sentence.right, indices)
+        return f"((not {left}) == (not {right}))"
+    raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+
+def step(sentence, indices, slots):
+    """
+    Returns a function of the values list and the model int m that
+    evaluates sentence, given the position in values of each of its
+    subsentences in slots.
+    """
+    if isinstance(sentence, Symbol):
+        mask = 1 << indices[sentence.name]
+        return lambda values, m: m & mask != 0
+    if isinstance(sentence, Not):
+        operand = slots[sentence.operand]
+        return lambda values, m: not values[operand]
+    if isinstance(sentence, And):
+        conjuncts = [slots[conjunct] for conjunct in sentence.conjuncts]
+        return lambda values, m: all(values[i] for i in conjuncts)
+    if isinstance(sentence, Or):
+        disjuncts = [slots[disjunct] for disjunct in sentence.disjuncts]
+        return lambda values, m: any(values[i] for i in disjuncts)
+    if isinstance(sentence, Implication):
+        antecedent = slots[sentence.antecedent]
+        consequent = slots[sentence.consequent]
+        return lambda values, m: not values[antecedent] or values[consequent]
+    if isinstance(sentence, Biconditional):
+        left = slots[sentence.left]
+        right = slots[sentence.right]
+        return lambda values, m: values[left] == values[right]
+    raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+
+def steps(sentence, indices):
+    """
+    Returns a function of the model int m that evaluates sentence by
+    running one step per distinct subsentence, each after the steps of the
+    subsentences it is built from. Neither building nor running the steps
+    recurses, so any depth of nesting works.
+    """
+    program = []
+    # Maps each subsentence to the position of its value
+    slots = {}
+    stack = [sentence]
+    while stack:
+        current = stack[-1]
+        if current in slots:
+            stack.pop()
+            continue
+        pending = [child for child in current.children() if child not in slots]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        slots[current] = len(program)
+        program.append(step(current, indices, slots))
+
+    def evaluate(m):
+        values = []
+        for run in program:
+            values.append(run(values, m))
+        return values[-1]
+    return evaluate
+
+
+def compile_sentence(sentence, indices=None):
+    """
+    Returns a function that takes a model int, with the value of the symbol
+    named name in bit indices[name], and returns True if sentence is true
+    in that model. indices defaults to symbol_indices(sentence).
+    """
+    if indices is None:
+        indices = symbol_indices(sentence)
+    try:
+        return eval(f"lambda m: bool({source(sentence, indices)})")
+    except (SyntaxError, RecursionError, MemoryError):
+        return steps(sentence, indices)
+
+
+def pack(model, indices):
+    """
+    Returns the model int of a model dictionary.
+    """
+    return sum(1 << i for name, i in indices.items() if model[name])
+
+
+def entails(knowledge, query):
+    """
+    Returns True if query is true in every model where knowledge is true,
+    checking every model with compiled sentences.
+    """
+    indices = symbol_indices(knowledge, query)
+    counterexample = compile_sentence(And(knowledge, Not(query)), indices)
+    return not any(map(counterexample, range(1 << len(indices))))
@@ -0,0 +1,476 @@
+"""
+SAT-based entailment for logic.py.
+
+A knowledge base entails a query exactly when KB ∧ ¬query has no model, so
+instead of enumerating every model, the sentences are turned into clauses
+and handed to a SAT solver.
+
+Sentences become clauses with the Tseitin transformation: every connective
+gets a fresh variable, defined by a few clauses to be equivalent to it, so
+the clauses grow linearly with the sentence instead of exponentially as
+they would by distributing Or over And. The solver is CDCL (conflict-driven
+clause learning) with two watched literals per clause, VSIDS branching,
+phase saving and Luby restarts. It can solve under assumptions and keeps
+what it learns between calls.
+
+Variables are positive ints, and the literal -v is the negation of v.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+# Factor by which variable activities decay after every conflict
+DECAY = 0.95
+
+# Conflicts in the first run between restarts, scaled by the Luby sequence
+RESTART_BASE = 100
+
+
+def luby(i):
+    """
+    Returns term i (counting from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    size = 1
+    power = 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i %= size
+    return 2 ** power
+
+
+class Solver():
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+        self.learnts = []
+        # Maps a literal to the clauses watching it
+        self.watches = {}
+
+        # By variable: 1 if true, -1 if false, 0 if unassigned, and the
+        # decision level and clause that set it
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+
+        # By variable: the last value it had, tried first when deciding it
+        self.phases = [-1]
+
+        # VSIDS: variables in recent conflicts are decided first. The heap
+        # holds (-activity, variable) and may hold stale entries.
+        self.activity = [0.0]
+        self.heap = []
+        self.increment = 1.0
+
+        self.trail = []
+        # Where each decision level starts on the trail
+        self.limits = []
+        # Next trail position to propagate
+        self.head = 0
+
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_var(self):
+        """
+        Returns a new variable.
+        """
+        self.count += 1
+        var = self.count
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(-1)
+        self.activity.append(0.0)
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.heap, (0.0, var))
+        return var
+
+    def value(self, literal):
+        """
+        Returns 1 if literal is true, -1 if false, 0 if unassigned.
+        """
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, the disjunction of literals. Returns False if the
+        clauses can no longer all be satisfied.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        literals = set(literals)
+        clause = []
+        for literal in literals:
+            if abs(literal) > self.count or literal == 0:
+                raise ValueError(f"unknown variable in literal {literal}")
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                return True
+            if value == 0:
+                clause.append(literal)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def attach(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.limits)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by a clause with one literal left.
+        Returns a clause with every literal false, or None.
+        """
+        values = self.values
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = watches[false]
+            watches[false] = kept = []
+            for index, clause in enumerate(watching):
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0] = clause[1]
+                    clause[1] = false
+                first = clause[0]
+                firstValue = values[abs(first)] if first > 0 else -values[abs(first)]
+                if firstValue == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1] = literal
+                        clause[k] = false
+                        watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if firstValue == -1:
+                        kept.extend(watching[index + 1:])
+                        self.head = len(self.trail)
+                        return clause
+                    self.assign(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): a clause learned from a conflict, whose first
+        literal is the only one assigned at the current level, and the level
+        to jump back to.
+        """
+        levels = self.levels
+        level = len(self.limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        literal = None
+        clause = conflict
+        index = len(self.trail) - 1
+        while True:
+            # The first literal of a reason is the one it implied
+            for other in (clause if literal is None else clause[1:]):
+                var = abs(other)
+                if var not in seen and levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if levels[var] == level:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            # Go back along the trail to the next literal involved
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(literal)]
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal that will be unassigned last
+        best = max(range(1, len(learnt)), key=lambda i: levels[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, levels[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.count + 1) if not self.values[v]]
+            heapq.heapify(self.heap)
+        elif not self.values[var]:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        """
+        Unassigns every literal above a decision level.
+        """
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phases[var] = self.values[var]
+            self.values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def pick(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.heap:
+            negative, var = heapq.heappop(self.heap)
+            if not self.values[var] and -negative == self.activity[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, with every literal in assumptions true,
+        have a model, which is then kept in self.model as a list of values
+        by variable. Clauses learned along the way are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        for literal in assumptions:
+            if abs(literal) > self.count or literal == 0:
+                raise ValueError(f"unknown variable in literal {literal}")
+
+        restarts = 0
+        budget = RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.attach(learnt)
+                    self.learnts.append(learnt)
+                    self.assign(learnt[0], learnt)
+                self.increment /= DECAY
+                budget -= 1
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = RESTART_BASE * luby(restarts)
+                self.backtrack(0)
+                continue
+
+            # The first decisions are the assumptions, one level each
+            level = len(self.limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            var = self.pick()
+            if var is None:
+                self.model = list(self.values)
+                self.backtrack(0)
+                return True
+            self.decisions += 1
+            self.limits.append(len(self.trail))
+            self.assign(var if self.phases[var] > 0 else -var, None)
+
+
+class Tseitin():
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        # Maps a symbol name to its variable
+        self.variables = {}
+        # Maps a sentence already encoded to its literal
+        self.literals = {}
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol called name.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding the clauses that
+        define it the first time the sentence is seen.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            var = self.solver.new_var()
+            for part in parts:
+                add([-var, part])
+            add([var] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            var = self.solver.new_var()
+            for part in parts:
+                add([var, -part])
+            add([-var] + parts)
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            var = self.solver.new_var()
+            add([-var, -antecedent, consequent])
+            add([var, antecedent])
+            add([var, -consequent])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            var = self.solver.new_var()
+            add([-var, -left, right])
+            add([-var, left, -right])
+            add([var, left, right])
+            add([var, -left, -right])
+        else:
+            raise TypeError(f"cannot convert {type(sentence).__name__} to clauses")
+        self.literals[sentence] = var
+        return var
+
+    def add(self, sentence):
+        """
+        Adds clauses saying that sentence is true. Returns False if the
+        clauses can no longer all be satisfied.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                if not self.add(conjunct):
+                    return False
+            return True
+        if isinstance(sentence, Or):
+            return self.solver.add_clause([self.literal(disjunct) for disjunct in sentence.disjuncts])
+        return self.solver.add_clause([self.literal(sentence)])
+
+
+def entails(knowledge, query):
+    """
+    Returns True if knowledge entails query, that is if knowledge ∧ ¬query
+    has no model.
+    """
+    encoder = Tseitin()
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    return not encoder.solver.solve()
+
+
+class KnowledgeBase():
+    """
+    A knowledge base that stays loaded in one solver, so that it can be
+    told new sentences and asked many queries without starting over:
+    clauses learned while answering one query speed up the next ones.
+    """
+
+    # Models kept to answer queries they refute without solving
+    MAX_MODELS = 32
+
+    def __init__(self, *sentences):
+        self.encoder = Tseitin()
+        self.solver = self.encoder.solver
+        self.sentences = []
+        # Calls to the solver, for benchmarks
+        self.solves = 0
+        # Recent models of the knowledge base, as {symbol name: value}
+        self.models = []
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def tell(self, sentence):
+        """
+        Adds sentence to the knowledge base.
+        """
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        # Earlier models need not satisfy the new sentence
+        self.models.clear()
+        self.encoder.add(sentence)
+
+    def consistent(self, assumptions=()):
+        """
+        Returns True if the knowledge base, with every sentence in
+        assumptions true, has a model.
+        """
+        return self.solve([self.encoder.literal(assumption) for assumption in assumptions])
+
+    def ask(self, query, assumptions=()):
+        """
+        Returns True if the knowledge base, with every sentence in
+        assumptions true, entails query.
+        """
+        # A known model where the assumptions hold and the query does not
+        # settles it without solving
+        for model in self.models:
+            try:
+                if (all(assumption.evaluate(model) for assumption in assumptions)
+                        and not query.evaluate(model)):
+                    return False
+            except Exception:
+                # The model does not cover every symbol of the query
+                continue
+        literals = [self.encoder.literal(assumption) for assumption in assumptions]
+        return not self.solve(literals + [-self.encoder.literal(query)])
+
+    def solve(self, assumptions):
+        self.solves += 1
+        if not self.solver.solve(assumptions):
+            return False
+        values = self.solver.model
+        model = {name: values[var] > 0 for name, var in self.encoder.variables.items()}
+        self.models.insert(0, model)
+        del self.models[self.MAX_MODELS:]
+        return True
@@ -0,0 +1,122 @@
+"""
+Vectorized truth-table checking for logic.py, using NumPy.
+
+Models are numbered as in compiled.py, bit i of the model number holding
+the value of symbol i, and checked in blocks of 2^BLOCK_BITS consecutive
+models. Within a block a sentence's value in every model is one bit of an
+array of 64-bit words, so And, Or and Not become bitwise operations over
+the whole block at once. The symbols that change within a block have the
+same bit patterns in every block, and the ones above them are constant
+across a block, so those are folded as plain booleans. Only one block is
+held at a time, and checking stops at the first block with a model where
+the knowledge base is true and the query false.
+"""
+
+from compiled import symbol_indices
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Models per block, as a power of two: 2^16 models take 1024 words
+BLOCK_BITS = 16
+
+# Bit patterns of the first six symbols within a 64-bit word of models
+WORD_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000
+]
+
+
+def block_patterns(bits):
+    """
+    Returns, for each of the first bits symbols, a word array with the
+    symbol's value in each of the 2^bits models of a block.
+    """
+    words = max(1, (1 << bits) // 64)
+    index = np.arange(words, dtype=np.uint64)
+    patterns = []
+    for i in range(bits):
+        if i < 6:
+            patterns.append(np.full(words, WORD_PATTERNS[i], dtype=np.uint64))
+        else:
+            # Above bit 5 a symbol is the same for all 64 models of a word
+            on = (index >> np.uint64(i - 6)) & np.uint64(1)
+            patterns.append(np.where(on == 1, np.uint64(0xFFFFFFFFFFFFFFFF), np.uint64(0)))
+    return patterns
+
+
+def evaluate(sentence, values):
+    """
+    Returns the value of sentence in every model of a block, as a word
+    array, or as a bool if it is the same in all of them. values maps each
+    symbol name to its word array or bool.
+    """
+    if isinstance(sentence, Symbol):
+        return values[sentence.name]
+    if isinstance(sentence, Not):
+        operand = evaluate(sentence.operand, values)
+        return (not operand) if isinstance(operand, bool) else ~operand
+    if isinstance(sentence, And):
+        result = True
+        for conjunct in sentence.conjuncts:
+            value = evaluate(conjunct, values)
+            if value is False:
+                return False
+            if value is not True:
+                result = value if result is True else result & value
+        return result
+    if isinstance(sentence, Or):
+        result = False
+        for disjunct in sentence.disjuncts:
+            value = evaluate(disjunct, values)
+            if value is True:
+                return True
+            if value is not False:
+                result = value if result is False else result | value
+        return result
+    if isinstance(sentence, Implication):
+        return evaluate(Or(Not(sentence.antecedent), sentence.consequent), values)
+    if isinstance(sentence, Biconditional):
+        left = evaluate(sentence.left, values)
+        right = evaluate(sentence.right, values)
+        if isinstance(left, bool) and isinstance(right, bool):
+            return left == right
+        if isinstance(left, bool):
+            return right if left else ~right
+        if isinstance(right, bool):
+            return left if right else ~left
+        return ~(left ^ right)
+    raise TypeError(f"cannot evaluate {type(sentence).__name__}")
+
+
+def entails(knowledge, query, block_bits=BLOCK_BITS):
+    """
+    Returns True if query is true in every model where knowledge is true,
+    checking 2^block_bits models at a time.
+    """
+    if np is None:
+        raise ImportError("the vectorized backend needs numpy")
+    indices = symbol_indices(knowledge, query)
+    names = sorted(indices, key=indices.get)
+    counterexample = And(knowledge, Not(query))
+
+    bits = min(len(names), block_bits)
+    patterns = block_patterns(bits)
+    # With fewer than 64 models, only the low bits of the one word are models
+    valid = np.uint64((1 << (1 << bits)) - 1 if bits < 6 else 0xFFFFFFFFFFFFFFFF)
+
+    values = dict(zip(names, patterns))
+    for block in range(1 << (len(names) - bits)):
+        for i, name in enumerate(names[bits:]):
+            values[name] = bool(block >> i & 1)
+        found = evaluate(counterexample, values)
+        if found is True or (found is not False and (found & valid).any()):
+            return False
+    return True